@@ -0,0 +1,39 @@
+"""Benchmark of Cisco parsing on deeply nested blocks.
+
+Every line sits under a chain of long parent lines, like ``router bgp`` /
+``address-family`` / ``vrf`` blocks. Run with
+``python -m benchmark.bench_cisco_depth``.
+"""
+
+from __future__ import annotations
+
+import time
+
+from cfgparser.cisco.parser import CiscoParser
+
+
+def _make_lines(depth: int, n_entries: int) -> list:
+    lines = ["!"]
+    for idx in range(depth):
+        lines.append(
+            " " * idx + f"level-{idx} " + " ".join(f"word-{w}" for w in range(8))
+        )
+    for idx in range(n_entries):
+        lines.append(" " * depth + f"neighbor 10.0.{idx // 256}.{idx % 256} activate")
+    lines.append("end")
+    return lines
+
+
+def main(n_entries: int = 20000) -> None:
+    for depth in (1, 4, 8, 16):
+        lines = _make_lines(depth, n_entries)
+
+        start = time.perf_counter()
+        CiscoParser().parse(lines)
+        elapsed = time.perf_counter() - start
+
+        print(f"depth {depth:>3}  {n_entries} lines  {elapsed:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
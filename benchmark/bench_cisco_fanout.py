@@ -0,0 +1,37 @@
+"""Benchmark of Cisco parsing on a wide fan-out block.
+
+Parses a config with many sibling ``ip prefix-list`` entries under the
+same parent. Run with ``python -m benchmark.bench_cisco_fanout``.
+"""
+
+from __future__ import annotations
+
+import time
+
+from cfgparser.cisco.parser import CiscoParser
+
+
+def _make_lines(n_entries: int) -> list:
+    lines = ["!"]
+    for idx in range(n_entries):
+        lines.append(
+            f"ip prefix-list PL-CUSTOMERS seq {idx * 5} permit "
+            f"10.{idx // 65536 % 256}.{idx // 256 % 256}.{idx % 256}/32"
+        )
+    lines.append("end")
+    return lines
+
+
+def main() -> None:
+    for n_entries in (25000, 50000, 100000):
+        lines = _make_lines(n_entries)
+
+        start = time.perf_counter()
+        CiscoParser().parse(lines)
+        elapsed = time.perf_counter() - start
+
+        print(f"{n_entries:>7} entries  {elapsed:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
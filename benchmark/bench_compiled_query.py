@@ -0,0 +1,61 @@
+"""Benchmark of a set of datapaths run against many configs.
+
+Compares parsing each path text for every config with compiled plans from
+``compile_path``. Run with ``python -m benchmark.bench_compiled_query``.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+from benchmark.bench_dumps import _make_lines
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.path.parser import DataPathParser
+from cfgparser.tree.finder import Query
+from cfgparser.tree.finder import compile_path
+from cfgparser.tree.index import PathIndex
+
+
+def _make_texts(n_ports: int, n_paths: int) -> list:
+    rnd = random.Random(0)
+    texts = []
+    for _ in range(n_paths):
+        idx = rnd.randrange(n_ports)
+        texts.append(f'configure/"port {idx // 64 + 1}/1/{idx % 64 + 1}"/ethernet')
+    return texts
+
+
+def main(n_ports: int = 2000, n_configs: int = 50, n_paths: int = 200) -> None:
+    parser = NokiaClassicParser()
+    parser.parse(_make_lines(n_ports))
+    tokens = parser._tree.tokens
+    queries = [Query(tokens, PathIndex(tokens)) for _ in range(n_configs)]
+    texts = _make_texts(n_ports, n_paths)
+
+    # Index the searched nodes before timing
+    for query in queries:
+        for text in texts:
+            query.query(DataPathParser(text).parse())
+    compile_path.cache_clear()
+
+    start = time.perf_counter()
+    for query in queries:
+        for text in texts:
+            query.query(DataPathParser(text).parse())
+    parse_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for query in queries:
+        for text in texts:
+            compile_path(text).execute(query)
+    compiled_elapsed = time.perf_counter() - start
+
+    n_runs = n_configs * n_paths
+    print(f"parse     {parse_elapsed / n_runs * 1e6:8.2f} us/path")
+    print(f"compiled  {compiled_elapsed / n_runs * 1e6:8.2f} us/path")
+    print(compile_path.cache_info())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark of the structured text rendering of a parsed config.
+
+Renders Nokia classic configs of growing size with ``dumps()`` and streams
+them to ``os.devnull`` with ``dump()``. Run with
+``python -m benchmark.bench_dumps``.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+
+
+def _make_lines(n_ports: int) -> list:
+    lines = ["# TiMOS-B-20.10.R1", "configure"]
+    for idx in range(n_ports):
+        lines += [
+            f"    port {idx // 64 + 1}/1/{idx % 64 + 1}",
+            f'        description "port {idx}"',
+            "        ethernet",
+            "            mode access",
+            "        exit",
+            "        no shutdown",
+            "    exit",
+        ]
+    lines += ["exit all", "# Finished"]
+    return lines
+
+
+def main() -> None:
+    for n_ports in (25000, 50000, 100000):
+        parser = NokiaClassicParser()
+        parser.parse(_make_lines(n_ports))
+
+        start = time.perf_counter()
+        parser.dumps()
+        dumps_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(os.devnull, "w") as fp:
+            parser.dump(fp)
+        dump_elapsed = time.perf_counter() - start
+
+        print(
+            f"{n_ports * 5:>7} nodes  dumps {dumps_elapsed:8.3f} s  "
+            f"dump {dump_elapsed:8.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
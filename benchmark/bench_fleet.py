@@ -0,0 +1,44 @@
+"""Benchmark of a fleet query over many config files.
+
+Writes Nokia classic configs to a temporary directory and queries them with
+``batch.query_fleet`` for a growing number of worker processes. Run with
+``python -m benchmark.bench_fleet``.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+
+from benchmark.bench_dumps import _make_lines
+from cfgparser.base import batch
+
+PATHS = [
+    'configure/"port 1/1/1"/description',
+    'configure/"port 1/1/2"/ethernet/mode',
+    'configure/"port 1/1/3"/shutdown',
+]
+
+
+def main(n_files: int = 400, n_ports: int = 500) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        text = "\n".join(_make_lines(n_ports))
+        for idx in range(n_files):
+            with open(os.path.join(tmp_dir, f"device-{idx}.cfg"), "w") as fd:
+                fd.write(text)
+
+        f_paths = batch.iter_files(tmp_dir)
+        n_cpus = os.cpu_count() or 1
+        for workers in sorted({1, max(1, n_cpus // 2), n_cpus}):
+            start = time.perf_counter()
+            n_records = sum(1 for _ in batch.query_fleet(f_paths, PATHS, workers))
+            elapsed = time.perf_counter() - start
+            print(
+                f"{workers:>3} workers  {n_files / elapsed:8.1f} files/s  "
+                f"{n_records} records"
+            )
+
+
+if __name__ == "__main__":
+    main()
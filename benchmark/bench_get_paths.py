@@ -0,0 +1,35 @@
+"""Benchmark of listing the paths of a parsed config.
+
+Walks every path of Nokia classic configs of growing size with
+``get_paths()`` and reports the time and the peak of memory allocated
+while listing. Run with ``python -m benchmark.bench_get_paths``.
+"""
+
+from __future__ import annotations
+
+import time
+import tracemalloc
+
+from benchmark.bench_dumps import _make_lines
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+
+
+def main() -> None:
+    for n_ports in (25000, 50000, 100000):
+        parser = NokiaClassicParser()
+        parser.parse(_make_lines(n_ports))
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        n_paths = sum(1 for _ in parser.get_paths())
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(
+            f"{n_paths:>7} paths  {elapsed:8.3f} s  peak {peak / 2**10:8.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
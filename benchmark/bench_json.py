@@ -0,0 +1,52 @@
+"""Benchmark of the JSON output of a parsed config.
+
+Compares the peak memory and time of ``json.dumps(parser.to_dict())``
+with streaming the same JSON by ``dump_json()``, both written to
+``os.devnull``. Run with ``python -m benchmark.bench_json``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+import tracemalloc
+
+from benchmark.bench_dumps import _make_lines
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+
+
+def _measure(f_write) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as fp:
+        f_write(fp)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def main() -> None:
+    for n_ports in (25000, 100000):
+        parser = NokiaClassicParser()
+        parser.parse(_make_lines(n_ports))
+
+        results = {
+            "json.dumps": _measure(
+                lambda fp: fp.write(
+                    json.dumps(parser.to_dict(), indent=4, sort_keys=True)
+                )
+            ),
+            "dump_json": _measure(parser.dump_json),
+        }
+        for name, (elapsed, peak) in results.items():
+            print(
+                f"{n_ports * 5:>7} nodes  {name:<11} {elapsed:8.3f} s  "
+                f"peak {peak / 2**20:8.2f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Micro-benchmark of the Nokia classic line tokenizer.
+
+Run with ``python -m benchmark.bench_nokia_tokenizer``.
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from cfgparser.nokia.classic.parser import NokiaTree
+
+LINES = {
+    "short": "            no shutdown",
+    "sap": "            sap 1/1/1:100 create",
+    "description": '            description "' + "customer link " * 40 + '"',
+    "wide": "            " + " ".join(f'"entry {idx}" {idx}' for idx in range(200)),
+}
+
+
+def main(number: int = 20000) -> None:
+    for name, line in LINES.items():
+        elapsed = timeit.timeit(lambda: NokiaTree._tokenize_line(line), number=number)
+        print(
+            f"{name:<12} len {len(line):>5}  {elapsed / number * 1e6:10.2f} us/line"
+        )
+
+
+if __name__ == "__main__":
+    main()
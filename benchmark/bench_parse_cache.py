@@ -0,0 +1,40 @@
+"""Benchmark of a Nokia classic config parsed and loaded from the parse cache.
+
+The first parse stores the tree in a temporary cache directory in the
+background, the second one with the same lines loads it. Run with
+``python -m benchmark.bench_parse_cache``.
+"""
+
+from __future__ import annotations
+
+import tempfile
+import time
+
+from benchmark.bench_dumps import _make_lines
+from cfgparser.base.cache import ParseCache
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+
+
+def main(n_ports: int = 50000) -> None:
+    lines = _make_lines(n_ports)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ParseCache(cache_dir)
+        timings = []
+        for _ in range(2):
+            parser = NokiaClassicParser(cache=cache)
+            start = time.perf_counter()
+            parser.parse(lines)
+            timings.append(time.perf_counter() - start)
+            cache.wait()
+
+        cold, warm = timings
+        print(
+            f"{n_ports:>7} ports  cold {cold * 1e3:10.1f} ms  "
+            f"warm {warm * 1e3:8.1f} ms  x{cold / warm:.1f}"
+        )
+        print(cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Benchmark of the process parallel parse of a Nokia classic config.
+
+Parses a config of many port sections with ``parse()`` and with
+``parse_parallel()`` for a growing number of workers. Each worker finds
+the sections of its range of the config text and sends them back as store
+bytes, the parent grafts the stores in order as views and merges the top
+level, so the speedup is bounded by that serial part. Run with
+``python -m benchmark.bench_parse_parallel``.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+
+from benchmark.bench_dumps import _make_lines
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+
+
+def main(n_ports: int = 100000) -> None:
+    lines = _make_lines(n_ports)
+    print(f"{len(lines)} lines, {os.cpu_count()} cpus")
+
+    start = time.perf_counter()
+    NokiaClassicParser().parse(lines)
+    serial = time.perf_counter() - start
+    print(f"{'parse':>16} {serial:8.2f} s")
+
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        NokiaClassicParser().parse_parallel(lines, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{'parallel x' + str(workers):>16} {elapsed:8.2f} s  "
+            f"x{serial / elapsed:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark of datapath predicates against filtering the dicts.
+
+Finds the saps of some services in a Nokia classic config with predicates,
+and by filtering the dicts of the whole ``service`` node. Run with
+``python -m benchmark.bench_predicate``.
+"""
+
+from __future__ import annotations
+
+import time
+import typing as t
+
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.tree.finder import compile_path
+
+
+def _make_lines(n_services: int, n_customers: int) -> list:
+    lines = ["# TiMOS-B-20.10.R1", "configure", "    service"]
+    for idx in range(n_services):
+        lines += [
+            f"        vpls {idx + 1} customer {idx % n_customers} create",
+            f'            description "service {idx}"',
+            f"            sap 1/1/{idx % 64 + 1}:{idx} create",
+            "                no shutdown",
+            "            exit",
+            "            no shutdown",
+            "        exit",
+        ]
+    lines += ["    exit", "exit all", "# Finished"]
+    return lines
+
+
+def _filter_dicts(parser: NokiaClassicParser, description: str) -> list:
+    saps = []
+    for service in parser.query(compile_path("configure/service")):
+        for vpls in service["service"].values():
+            if vpls.get("description") != description:
+                continue
+            saps += [{k: v} for k, v in vpls.items() if k.startswith("sap")]
+    return saps
+
+
+def _timeit(parser: NokiaClassicParser, func: t.Callable) -> t.Tuple[float, list]:
+    start = time.perf_counter()
+    saps = func()
+    return time.perf_counter() - start, saps
+
+
+def main(n_services: int = 50000, n_customers: int = 1000) -> None:
+    parser = NokiaClassicParser()
+    parser.parse(_make_lines(n_services, n_customers))
+    compile_path("configure/service/vpls").execute(parser._get_query())
+
+    # Params like the customer are not in the dicts, the dicts are filtered
+    # with the description
+    texts = [
+        'configure/service/vpls[description="service 7"]/sap',
+        "configure/service/vpls[customer=7]/sap",
+    ]
+    runs = [("dicts", lambda: _filter_dicts(parser, "service 7"))]
+    for text in texts:
+        runs.append((text, lambda text=text: parser.query(compile_path(text))))
+
+    for name, func in runs:
+        elapsed, saps = _timeit(parser, func)
+        print(f"{name:>52}  {elapsed * 1e3:9.2f} ms  {len(saps)} saps")
+
+
+if __name__ == "__main__":
+    main()
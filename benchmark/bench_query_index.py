@@ -0,0 +1,55 @@
+"""Benchmark of datapath queries with and without the path index.
+
+Runs random port queries against a Nokia classic config with a wide
+``configure`` node. Run with ``python -m benchmark.bench_query_index``.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+from benchmark.bench_dumps import _make_lines
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.path.path import DataPath
+from cfgparser.tree.finder import Query
+from cfgparser.tree.index import PathIndex
+
+
+def _make_queries(n_ports: int, n_queries: int) -> list:
+    rnd = random.Random(0)
+    queries = []
+    for _ in range(n_queries):
+        idx = rnd.randrange(n_ports)
+        port = f"port {idx // 64 + 1}/1/{idx % 64 + 1}"
+        queries.append(["configure", port, "ETHERNET"])
+    return queries
+
+
+def _run(query: Query, queries: list) -> float:
+    start = time.perf_counter()
+    for paths in queries:
+        query.query(DataPath(list(paths)))
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main(n_ports: int = 100000, n_queries: int = 100000) -> None:
+    parser = NokiaClassicParser()
+    parser.parse(_make_lines(n_ports))
+    tokens = parser._tree.tokens
+
+    scan_elapsed = _run(Query(tokens), _make_queries(n_ports, 100))
+    print(f"{n_ports:>7} ports  scan   {scan_elapsed * 1e6:10.1f} us/query")
+
+    start = time.perf_counter()
+    index = PathIndex(tokens)
+    index_elapsed = _run(Query(tokens, index), _make_queries(n_ports, n_queries))
+    total = time.perf_counter() - start
+    print(
+        f"{n_ports:>7} ports  index  {index_elapsed * 1e6:10.1f} us/query  "
+        f"{n_queries} queries in {total:.2f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark of many datapaths sharing prefixes queried in one walk.
+
+Compares one ``execute()`` for each path with ``Query.query_many()``, with
+and without the path index. Run with ``python -m benchmark.bench_query_many``.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+from benchmark.bench_dumps import _make_lines
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.tree.finder import Query
+from cfgparser.tree.finder import compile_path
+from cfgparser.tree.index import PathIndex
+
+
+def _make_compileds(n_ports: int, n_paths: int) -> list:
+    rnd = random.Random(0)
+    compileds = []
+    for _ in range(n_paths):
+        idx = rnd.randrange(n_ports)
+        port = f'"port {idx // 64 + 1}/1/{idx % 64 + 1}"'
+        leaf = rnd.choice(["ethernet/mode", "description", "shutdown"])
+        compileds.append(compile_path(f"configure/{port}/{leaf}"))
+    return compileds
+
+
+def main(n_ports: int = 20000, n_paths: int = 500) -> None:
+    parser = NokiaClassicParser()
+    parser.parse(_make_lines(n_ports))
+    tokens = parser._tree.tokens
+    compileds = _make_compileds(n_ports, n_paths)
+
+    for name, query in (
+        ("scan", Query(tokens)),
+        ("index", Query(tokens, PathIndex(tokens))),
+    ):
+        start = time.perf_counter()
+        singles = [compiled.execute(query) for compiled in compileds]
+        single_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        many = query.query_many(compileds)
+        many_elapsed = time.perf_counter() - start
+
+        assert many == singles
+        print(
+            f"{name:>5}  {n_paths} paths  single {single_elapsed * 1e3:9.2f} ms  "
+            f"query_many {many_elapsed * 1e3:9.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
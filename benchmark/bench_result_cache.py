@@ -0,0 +1,43 @@
+"""Benchmark of repeated parser results with the result cache.
+
+Repeats ``to_dict()``, ``dumps()`` and random port queries of a Nokia
+classic config, as a prompt session does. Run with
+``python -m benchmark.bench_result_cache``.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+import typing as t
+
+from benchmark.bench_dumps import _make_lines
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.path.path import DataPath
+
+
+def _timeit(func: t.Callable) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(n_ports: int = 20000, n_queries: int = 1000) -> None:
+    parser = NokiaClassicParser(result_cache_sz=NokiaClassicParser.RESULT_CACHE_SZ)
+    parser.parse(_make_lines(n_ports))
+
+    for name, func in (("to_dict", parser.to_dict), ("dumps", parser.dumps)):
+        miss = _timeit(func)
+        hit = _timeit(func)
+        print(f"{name:>8}  miss {miss * 1e3:10.2f} ms  hit {hit * 1e6:10.2f} us")
+
+    rnd = random.Random(0)
+    ports = [f"port 1/1/{rnd.randrange(64) + 1}" for _ in range(n_queries)]
+    queries = [DataPath(["configure", port]) for port in ports]
+    elapsed = _timeit(lambda: [parser.query(q) for q in queries])
+    print(f"{'query':>8}  {elapsed / n_queries * 1e6:10.2f} us/query")
+    print(parser.result_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark of the string pool on a fleet of parsed configs.
+
+Keeps a fleet of parsed Nokia classic and Cisco configs in memory, once
+with a private pool per parser and once with one pool shared by all of
+them, and reports the memory kept by the parsers. Run with
+``python -m benchmark.bench_string_pool [n_configs]``.
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+
+from cfgparser.cisco.parser import CiscoParser
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.tree.pool import StringPool
+
+
+def _nokia_lines(idx: int) -> list:
+    lines = ["# TiMOS-B-20.10.R1", "configure", "    system", f"        name PE{idx}"]
+    lines += ["    exit", "    service"]
+    for svc in range(20):
+        lines += [
+            f'        vpls {svc} name "vpls-{svc}" customer 1 create',
+            f'            description "vpls service {svc}"',
+            "            stp",
+            "                shutdown",
+            "            exit",
+            f"            sap 1/1/{svc % 8 + 1}:{svc} create",
+            "                no shutdown",
+            "            exit",
+            "            no shutdown",
+            "        exit",
+        ]
+    lines += ["    exit", "exit all", "# Finished"]
+    return lines
+
+
+def _cisco_lines(idx: int) -> list:
+    lines = ["!", f"hostname CE{idx}", "!"]
+    for port in range(20):
+        lines += [
+            f"interface GigabitEthernet0/0/{port}",
+            f" description link to PE{idx} port {port}",
+            f" ip address 10.{idx % 256}.{port}.1 255.255.255.0",
+            " no shutdown",
+            "!",
+        ]
+    lines.append("end")
+    return lines
+
+
+def _load_fleet(n_configs: int, pool: None | StringPool) -> int:
+    fleet_lines = [
+        _nokia_lines(idx) if idx % 2 else _cisco_lines(idx) for idx in range(n_configs)
+    ]
+
+    gc.collect()
+    tracemalloc.start()
+    parsers = []
+    for idx, lines in enumerate(fleet_lines):
+        parser = NokiaClassicParser(pool) if idx % 2 else CiscoParser(pool)
+        parser.parse(iter([line + "\n" for line in lines]))
+        parsers.append(parser)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return size
+
+
+def main(n_configs: int = 1000) -> None:
+    private_size = _load_fleet(n_configs, None)
+    print(f"{n_configs:>6} configs  private pools {private_size / 2**20:8.2f} MiB")
+
+    pool = StringPool()
+    shared_size = _load_fleet(n_configs, pool)
+    print(f"{n_configs:>6} configs  shared pool   {shared_size / 2**20:8.2f} MiB")
+
+    stats = pool.stats()
+    print(
+        f"pool size {stats['size']}  {stats['bytes'] / 2**20:.2f} MiB  "
+        f"hit rate {stats['hit_rate']:.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,55 @@
+"""Micro-benchmark of the Nokia classic token builder dispatch.
+
+Measures ``create_token`` on common lines, then registers hundreds of
+unrelated builders to show the dispatch cost does not grow with them.
+Run with ``python -m benchmark.bench_token_dispatch``.
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from cfgparser.nokia.classic import tokenizer
+from cfgparser.tree.token import AbstractTokenBuilder
+from cfgparser.tree.token import Token
+
+WORDS = [
+    ["no", "shutdown"],
+    ["description", "customer link"],
+    ["sap", "1/1/1:100", "create"],
+    ["vpls", "100", "name", "100", "customer", "1", "create"],
+]
+
+
+def _make_builder(keyword: str) -> AbstractTokenBuilder:
+    class _Builder(AbstractTokenBuilder):
+        keywords = ((keyword, None),)
+
+        @staticmethod
+        def check_rule(words: list) -> bool:
+            return False
+
+        @staticmethod
+        def create(words: list, indent: int) -> Token:
+            return Token(keyword, None, indent)
+
+    return _Builder()
+
+
+def _run(label: str, number: int) -> None:
+    elapsed = timeit.timeit(
+        lambda: [tokenizer.create_token(words, 8) for words in WORDS], number=number
+    )
+    print(f"{label:<20} {elapsed / (number * len(WORDS)) * 1e6:8.3f} us/line")
+
+
+def main(number: int = 50000) -> None:
+    _run("default builders", number)
+
+    for idx in range(500):
+        tokenizer.register_builder(_make_builder(f"keyword-{idx}"))
+    _run("+500 builders", number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark of the columnar token store against the object tree.
+
+Reports the memory kept by a parsed Nokia classic config and the query
+speed before and after ``compact()``. Run with
+``python -m benchmark.bench_tree_store``.
+"""
+
+from __future__ import annotations
+
+import gc
+import time
+import tracemalloc
+
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.path.path import DataPath
+
+QUERIES = [
+    ["configure", "service", "vpls 1000"],
+    ["configure", "service", "vpls 1", "sap 1/1/2"],
+    ["configure", "port"],
+]
+
+
+def _make_lines(n_services: int) -> list:
+    lines = ["# TiMOS-B-20.10.R1", "configure", "    service"]
+    for idx in range(n_services):
+        lines += [
+            f'        vpls {idx} name "vpls-{idx}" customer 1 create',
+            f'            description "vpls service {idx}"',
+            "            service-mtu 1514",
+            "            stp",
+            "                shutdown",
+            "            exit",
+            f"            sap 1/1/{idx % 40 + 1}:{idx} create",
+            "                ingress",
+            "                    qos 10",
+            "                exit",
+            "                no shutdown",
+            "            exit",
+            "            no shutdown",
+            "        exit",
+        ]
+    lines += ["    exit", "exit all", "# Finished"]
+    return lines
+
+
+def _parse(lines: list, compact: bool) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    parser = NokiaClassicParser()
+    parser.parse(lines)
+    if compact:
+        parser.compact()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return parser, size
+
+
+def _time_queries(parser: NokiaClassicParser, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        for paths in QUERIES:
+            parser.query(DataPath(list(paths)))
+    return (time.perf_counter() - start) / (number * len(QUERIES))
+
+
+def main(number: int = 20) -> None:
+    for n_services in (5000, 20000):
+        lines = _make_lines(n_services)
+
+        for name, compact in (("objects", False), ("store", True)):
+            parser, size = _parse(lines, compact)
+            elapsed = _time_queries(parser, number)
+            print(
+                f"{n_services:>6} services  {name:<8} {size / 2**20:8.2f} MiB  "
+                f"{elapsed * 1e3:8.2f} ms/query"
+            )
+
+
+if __name__ == "__main__":
+    main()
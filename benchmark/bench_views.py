@@ -0,0 +1,53 @@
+"""Benchmark of query results as views against plain dicts.
+
+Queries the whole ``configure/service`` node of a Nokia classic config with
+many services, then reads one field of it. Run with
+``python -m benchmark.bench_views``.
+"""
+
+from __future__ import annotations
+
+import time
+import tracemalloc
+
+from benchmark.bench_predicate import _make_lines
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.tree.finder import compile_path
+from cfgparser.tree.transformer import Transformer
+
+
+def main(n_services: int = 50000) -> None:
+    parser = NokiaClassicParser()
+    parser.parse(_make_lines(n_services, 1000))
+    compiled = compile_path("configure/service")
+    query = parser._get_query()
+    compiled.execute(query)
+
+    runs = [
+        ("dicts", lambda t: Transformer(t).to_dict()),
+        ("views", lambda t: Transformer(t).to_view()),
+    ]
+    for name, convert in runs:
+        start = time.perf_counter()
+        matches = [convert(t) for t in compiled.execute(query)]
+        query_elapsed = time.perf_counter() - start
+
+        # Reading a key of a view reads the keys of its level only
+        start = time.perf_counter()
+        description = matches[0]["service"]["vpls 7"]["description"]
+        read_elapsed = time.perf_counter() - start
+        del matches
+
+        tracemalloc.start()
+        matches = [convert(t) for t in compiled.execute(query)]
+        __, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del matches
+
+        print(
+            f"{name}  query {query_elapsed * 1e3:10.3f} ms  {peak / 2**20:8.2f} MiB  "
+            f"read {read_elapsed * 1e3:8.3f} ms  {description}"
+        )
+
+if __name__ == "__main__":
+    main()
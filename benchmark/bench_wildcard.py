@@ -0,0 +1,47 @@
+"""Benchmark of wildcard and regex datapaths on a large tree.
+
+Runs ``**`` searches and regex parts on a Nokia classic config, with and
+without the path index. Run with ``python -m benchmark.bench_wildcard``.
+"""
+
+from __future__ import annotations
+
+import time
+
+from benchmark.bench_dumps import _make_lines
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.tree.finder import Query
+from cfgparser.tree.finder import compile_path
+from cfgparser.tree.index import PathIndex
+
+TEXTS = [
+    "**/mode",
+    "configure/*/ethernet/mode",
+    'configure/"~^port 1/1/1[0-9]$~"',
+    'configure/"~/1/1[0-9]$~"/description',
+]
+
+
+def main(n_ports: int = 100000) -> None:
+    parser = NokiaClassicParser()
+    parser.parse(_make_lines(n_ports))
+    tokens = parser._tree.tokens
+    queries = (("scan", Query(tokens)), ("index", Query(tokens, PathIndex(tokens))))
+
+    for text in TEXTS:
+        compiled = compile_path(text)
+        for name, query in queries:
+            # The second run finds the nodes indexed by the first one
+            elapsed = []
+            for _ in range(2):
+                start = time.perf_counter()
+                founds = compiled.execute(query)
+                elapsed.append(time.perf_counter() - start)
+            print(
+                f"{text:>36}  {name:>5}  first {elapsed[0] * 1e3:9.2f} ms  "
+                f"next {elapsed[1] * 1e3:9.2f} ms  {len(founds)} tokens"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+import pickle
+import threading
 import typing as t
 from abc import abstractmethod
 
 from loguru import logger
 
+from cfgparser.base.cache import LruCache
+from cfgparser.base.cache import ParseCache
 from cfgparser.path.path import DataPath
+from cfgparser.tree.encoder import JsonEncoder
+from cfgparser.tree.finder import CompiledQuery
 from cfgparser.tree.finder import Query
+from cfgparser.tree.finder import compile_path
+from cfgparser.tree.index import PathIndex
+from cfgparser.tree.pool import StringPool
+from cfgparser.tree.store import StoreTree
 from cfgparser.tree.transformer import Transformer
 
 
@@ -21,14 +31,32 @@ class AbstractParser:
     @abstractmethod
     def dumps(self) -> str: ...
 
+    @abstractmethod
+    def dump(self, fp: t.TextIO) -> None: ...
+
+    @abstractmethod
+    def dump_json(
+        self,
+        fp: t.TextIO,
+        datapath: None | DataPath | CompiledQuery = None,
+        ndjson: bool = False,
+    ) -> None: ...
+
     @abstractmethod
     def to_dict(self) -> dict: ...
 
     @abstractmethod
-    def query(self, datapath: DataPath) -> list: ...
+    def query(self, datapath: DataPath | CompiledQuery) -> list: ...
 
     @abstractmethod
-    def get_paths(self) -> t.List[DataPath]: ...
+    def query_many(
+        self, datapaths: t.Iterable[str | CompiledQuery]
+    ) -> t.Dict[str | CompiledQuery, list]: ...
+
+    @abstractmethod
+    def get_paths(
+        self, max_depth: None | int = None, prefix: None | t.Sequence[str] = None
+    ) -> t.Iterable[DataPath]: ...
 
 
 class NullParser(AbstractParser):
@@ -49,46 +77,281 @@ class NullParser(AbstractParser):
         self._show_message()
         return ""
 
+    def dump(self, fp: t.TextIO) -> None:
+        self._show_message()
+
+    def dump_json(
+        self,
+        fp: t.TextIO,
+        datapath: None | DataPath | CompiledQuery = None,
+        ndjson: bool = False,
+    ) -> None:
+        self._show_message()
+
     def to_dict(self) -> dict:
         self._show_message()
         return {}
 
-    def query(self, datapath: DataPath) -> list:
+    def query(self, datapath: DataPath | CompiledQuery) -> list:
         self._show_message()
         return []
 
-    def get_paths(self) -> t.List[DataPath]:
+    def query_many(
+        self, datapaths: t.Iterable[str | CompiledQuery]
+    ) -> t.Dict[str | CompiledQuery, list]:
+        self._show_message()
+        return {}
+
+    def get_paths(
+        self, max_depth: None | int = None, prefix: None | t.Sequence[str] = None
+    ) -> t.Iterable[DataPath]:
         self._show_message()
         return []
 
 
 class BaseParser(NullParser):
-    def __init__(self) -> None:
+    # Bytes of results cached for an interactive session, see result_cache_sz
+    RESULT_CACHE_SZ = 64 * 1024 * 1024
+
+    # Part of the key of the parse cache, to be increased when the tree made
+    # from the same lines changes
+    VERSION = 1
+
+    def __init__(
+        self,
+        pool: None | StringPool = None,
+        cache: None | ParseCache = None,
+        result_cache_sz: int = 0,
+    ) -> None:
         self._tree: t.Any = None
+        self.cache = cache
+
+        # Save of the tree to the cache still reading the tokens
+        self._saving: None | threading.Thread = None
+
+        # Words are interned in the shared pool when given, otherwise in a
+        # private pool released after each parse
+        self.pool = pool
+
+        # Incremented each time the tree changes, what is built from the
+        # tree is dropped with it
+        self.generation = 0
+        self._index: None | PathIndex = None
+
+        # Results of to_dict(), dumps() and query() are cached up to
+        # result_cache_sz bytes when given, result_cache.stats() shows the
+        # hits and misses. Each call still returns its own dict or list
+        self.result_cache: None | LruCache = None
+        if result_cache_sz > 0:
+            self.result_cache = LruCache(result_cache_sz)
+
+    def _set_tree_changed(self) -> None:
+        self.generation += 1
+        self._index = None
+        if self.result_cache is not None:
+            self.result_cache.clear()
+
+    @abstractmethod
+    def _create_tree(self) -> t.Any: ...
+
+    @abstractmethod
+    def _parse_lines(self, lines: t.Iterable) -> None: ...
+
+    def _thaw_tree(self) -> None:
+        # Tokens of a store are moved back to a parser tree, the lines parsed
+        # next are merged in as if compact() was never called
+        if not isinstance(self._tree, StoreTree):
+            return
+
+        store = self._tree.store
+        if self.pool is not None:
+            store.strings = self.pool.intern_words(store.strings)
+
+        tree = self._create_tree()
+        tree.graft(store.to_tokens())
+        self._tree = tree
+
+    def _wait_saved(self) -> None:
+        if self._saving is not None:
+            self._saving.join()
+            self._saving = None
+
+    def parse(self, lines: t.Iterable) -> None:
+        # With a cache, the tree of the same lines parsed before is loaded
+        # instead as a store, like after compact(), until the next parse. A
+        # parsed tree is kept and saved to the cache in the background
+        self._wait_saved()
+        self._thaw_tree()
+        if self.cache is None or self._tree.tokens:
+            self._parse_lines(lines)
+            return
+
+        # Lines read from an iterator are parsed as such, see the parsers
+        is_iterator = iter(lines) is lines
+        lines = list(lines)
+
+        parser_id = f"{type(self).__name__}/{self.VERSION}/{int(is_iterator)}"
+        key = self.cache.get_key(parser_id, lines)
+        store = self.cache.load(key)
+        if store is not None:
+            self._tree = StoreTree(store)
+            self._set_tree_changed()
+            return
+
+        self._parse_lines(iter(lines) if is_iterator else lines)
+        tokens = self._tree.tokens
+        self._saving = self.cache.save_later(
+            key, lambda: StoreTree.from_tokens(tokens).store
+        )
+
+    def _finish_parse(self) -> None:
+        self._set_tree_changed()
+
+        if self.pool is None and self._tree:
+            self._tree.pool.clear()
+
+    @staticmethod
+    def _compile(datapath: DataPath | CompiledQuery) -> CompiledQuery:
+        if isinstance(datapath, CompiledQuery):
+            return datapath
+        return CompiledQuery(datapath)
+
+    def _get_query(self) -> Query:
+        # Queries use the path index, it is built once for each tree
+        if self._index is None:
+            self._index = PathIndex(self._tree.tokens)
+        return Query(self._tree.tokens, self._index)
+
+    def _get_result(self, key: t.Hashable, build: t.Callable[[], t.Any]) -> t.Any:
+        if self.result_cache is None:
+            return build()
+
+        result = self.result_cache.get(key)
+        if result is None:
+            result = build()
+            self.result_cache.put(key, result)
+        return result
 
     def dumps(self) -> str:
         if not self._tree:
             return ""
-        return Query(self._tree.tokens).dump_str()
+
+        return self._get_result(
+            ("dumps",), lambda: Query(self._tree.tokens).dump_str()
+        )
+
+    def dump(self, fp: t.TextIO) -> None:
+        # Stream the text of dumps() to fp line by line
+        if not self._tree:
+            return
+
+        Query(self._tree.tokens).dump(fp)
+
+    def dump_json(
+        self,
+        fp: t.TextIO,
+        datapath: None | DataPath | CompiledQuery = None,
+        ndjson: bool = False,
+    ) -> None:
+        # Stream the JSON of to_dict(), or of query() when datapath is given,
+        # to fp. NDJSON writes one line for each match or root token
+        tokens = self._tree.tokens if self._tree else []
+        if datapath and self._tree:
+            tokens = self._compile(datapath).execute(self._get_query())
+
+        encoder = JsonEncoder(indent=4, sort_keys=True)
+        if ndjson:
+            fp.writelines(encoder.iter_ndjson(tokens))
+        elif datapath:
+            fp.writelines(encoder.iter_list(tokens))
+        else:
+            fp.writelines(encoder.iter_dict(tokens))
 
     def to_dict(self) -> dict:
         if not self._tree:
             return {}
 
-        return Query(self._tree.tokens).to_dict()
+        if self.result_cache is None:
+            return Query(self._tree.tokens).to_dict()
 
-    def query(self, datapath: DataPath) -> list:
+        # The dict is cached pickled, unpickling a new dict for each call
+        # takes about a third of the time to build it
+        data = self._get_result(
+            ("to_dict",),
+            lambda: pickle.dumps(
+                Query(self._tree.tokens).to_dict(), pickle.HIGHEST_PROTOCOL
+            ),
+        )
+        return pickle.loads(data)
+
+    def query(self, datapath: DataPath | CompiledQuery) -> list:
         if not self._tree:
             return []
 
-        tokens = Query(self._tree.tokens).query(datapath)
-        return [Transformer(t).to_dict() for t in tokens]
+        compiled = self._compile(datapath)
+
+        # Matches are read only views of the tree, see TokenView.to_dict()
+        def build() -> list:
+            tokens = compiled.execute(self._get_query())
+            return [Transformer(t).to_view() for t in tokens]
 
-    def get_paths(self) -> t.List[DataPath]:
+        # Parts are matched ignoring case, as are the cached results. Views
+        # are read only, only the list is copied
+        return list(self._get_result(("query", compiled.segments), build))
+
+    def query_many(
+        self, datapaths: t.Iterable[str | CompiledQuery]
+    ) -> t.Dict[str | CompiledQuery, list]:
+        # Results of query() keyed by the given path texts or plans, the
+        # paths not cached are all searched in one walk of the tree
+        entries = []
+        missings: t.Dict[tuple, CompiledQuery] = {}
+        for datapath in datapaths:
+            if isinstance(datapath, str):
+                compiled = compile_path(datapath)
+            else:
+                compiled = datapath
+
+            key = ("query", compiled.segments)
+            result = None
+            if not self._tree:
+                result = []
+            elif self.result_cache is not None:
+                result = self.result_cache.get(key)
+            if result is None:
+                missings[key] = compiled
+            entries.append((datapath, key, result))
+
+        builts = {}
+        if missings:
+            founds = self._get_query().query_many(list(missings.values()))
+            for key, tokens in zip(missings, founds):
+                builts[key] = [Transformer(t).to_view() for t in tokens]
+                if self.result_cache is not None:
+                    self.result_cache.put(key, builts[key])
+
+        return {
+            datapath: list(builts[key] if result is None else result)
+            for datapath, key, result in entries
+        }
+
+    def get_paths(
+        self, max_depth: None | int = None, prefix: None | t.Sequence[str] = None
+    ) -> t.Iterable[DataPath]:
         if not self._tree:
             return []
 
-        return Query(self._tree.tokens).get_paths()
+        return Query(self._tree.tokens).get_paths(max_depth, prefix)
+
+    def compact(self) -> None:
+        # Move the parsed tokens to a columnar store. Queries over the store
+        # are about 2x slower than over the tokens, a next parse() moves the
+        # tokens back first
+        if not self._tree or isinstance(self._tree, StoreTree):
+            return
+
+        self._tree = StoreTree.from_tokens(self._tree.tokens)
+        self._set_tree_changed()
 
 
 # Static or singleton NULL_PARSER
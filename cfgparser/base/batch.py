@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import functools
+import glob
+import os
+import typing as t
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from cfgparser.base import base
+from cfgparser.base.cache import ParseCache
+from cfgparser.cisco.parser import CiscoParser
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.tree.pool import StringPool
+
+PARSERS: t.Dict[str, t.Type[base.BaseParser]] = {
+    "Nokia Classic": NokiaClassicParser,
+    "Cisco": CiscoParser,
+}
+
+
+def identify_parser(fd: t.IO[str]) -> None | t.Type[base.BaseParser]:
+    for parser_cls in PARSERS.values():
+        fd.seek(0)
+        if parser_cls.identify(fd):
+            return parser_cls
+
+    return None
+
+
+def parse_file(
+    f_path: str, pool: None | StringPool = None, cache: None | ParseCache = None
+) -> None | base.BaseParser:
+    with open(f_path, "r") as fd:
+        parser_cls = identify_parser(fd)
+        if not parser_cls:
+            return None
+
+        fd.seek(0)
+        parser = parser_cls(pool, cache)
+        parser.parse(fd)
+
+    return parser
+
+
+def parse_many(
+    f_paths: t.Iterable[str],
+    workers: None | int = None,
+    pool: None | StringPool = None,
+    cache: None | ParseCache = None,
+) -> t.List[base.AbstractParser]:
+    # Every file gets its own parser instance, so files can be parsed by
+    # concurrent threads. Files without compatible parser get NULL_PARSER.
+    # The parsers share one string pool
+    if pool is None:
+        pool = StringPool()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        parse = functools.partial(parse_file, pool=pool, cache=cache)
+        return [p or base.NULL_PARSER for p in executor.map(parse, f_paths)]
+
+
+def iter_files(target: str) -> t.List[str]:
+    # Files under a directory, or matching a glob pattern, sorted
+    if os.path.isdir(target):
+        f_paths = [
+            os.path.join(root, name)
+            for root, __, names in os.walk(target)
+            for name in names
+        ]
+    else:
+        f_paths = [p for p in glob.glob(target, recursive=True) if os.path.isfile(p)]
+
+    return sorted(f_paths)
+
+
+def query_file(
+    f_path: str, paths: t.Sequence[str], cache: None | ParseCache = None
+) -> t.List[dict]:
+    # Records of one file, a match for each path or the error of the file
+    try:
+        parser = parse_file(f_path, cache=cache)
+        if parser is None:
+            return [{"file": f_path, "error": "no compatible parser"}]
+
+        results = parser.query_many(paths)
+    except Exception as e:
+        return [{"file": f_path, "error": f"{type(e).__name__}: {e}"}]
+
+    return [
+        {"file": f_path, "path": path, "match": match.to_dict()}
+        for path, matches in results.items()
+        for match in matches
+    ]
+
+
+def _query_files(
+    f_paths: t.Sequence[str], paths: t.Sequence[str], cache: None | ParseCache = None
+) -> t.List[dict]:
+    return [
+        record for f_path in f_paths for record in query_file(f_path, paths, cache)
+    ]
+
+
+def _get_error_records(f_paths: t.Sequence[str], e: Exception) -> t.List[dict]:
+    return [{"file": f_path, "error": f"{type(e).__name__}: {e}"} for f_path in f_paths]
+
+
+def _query_alone(
+    chunks: t.Sequence[t.Sequence[str]],
+    paths: t.Sequence[str],
+    cache: None | ParseCache,
+) -> t.Iterator[dict]:
+    # Each chunk is queried in a process of its own, the files of a chunk
+    # killing its process are queried alone to find the one doing it
+    for chunk in chunks:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(_query_files, chunk, paths, cache)
+            try:
+                records = future.result()
+            except BrokenProcessPool as e:
+                if len(chunk) > 1:
+                    yield from _query_alone([[f] for f in chunk], paths, cache)
+                else:
+                    yield from _get_error_records(chunk, e)
+                continue
+            except Exception as e:
+                records = _get_error_records(chunk, e)
+
+        yield from records
+
+
+def query_fleet(
+    f_paths: t.Sequence[str],
+    paths: t.Sequence[str],
+    workers: None | int = None,
+    chunk_sz: None | int = None,
+    cache: None | ParseCache = None,
+) -> t.Iterator[dict]:
+    # Files are queried by worker processes in chunks of chunk_sz files, the
+    # records of a chunk are yielded as soon as the whole chunk is done. A
+    # file failing gives an error record and the other files go on
+    if not f_paths:
+        return
+
+    n_workers = workers or os.cpu_count() or 1
+    if chunk_sz is None:
+        chunk_sz = max(1, min(64, len(f_paths) // (n_workers * 4)))
+
+    paths = list(paths)
+    chunks = [f_paths[i : i + chunk_sz] for i in range(0, len(f_paths), chunk_sz)]
+    while chunks:
+        unfinished = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_query_files, chunk, paths, cache): idx
+                for idx, chunk in enumerate(chunks)
+            }
+
+            for future in as_completed(futures):
+                chunk = chunks[futures[future]]
+                try:
+                    records = future.result()
+                except BrokenProcessPool:
+                    unfinished.append(futures[future])
+                    continue
+                except Exception as e:
+                    records = _get_error_records(chunk, e)
+                yield from records
+
+        # A worker died and every chunk not done failed with it. Workers run
+        # the first chunks submitted plus one queued, those are queried alone
+        # and the others go on in a new pool
+        chunks = [chunks[idx] for idx in sorted(unfinished)]
+        yield from _query_alone(chunks[: n_workers + 1], paths, cache)
+        chunks = chunks[n_workers + 1 :]
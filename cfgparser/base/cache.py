@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+
+from loguru import logger
+
+from cfgparser.tree.store import FORMAT_VERSION
+from cfgparser.tree.store import TokenStore
+
+
+# Bytes of an ASCII string without its characters
+_STR_SZ = sys.getsizeof("")
+
+
+def get_result_size(value: t.Any) -> int:
+    # Approximate bytes of nested dicts, lists and strings. Strings shared
+    # with the tokens are counted too, so the size is an upper bound
+    getsizeof = sys.getsizeof
+    size = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        size += getsizeof(item)
+
+        if type(item) is dict:
+            for key, child in item.items():
+                size += _STR_SZ + len(key)
+                if type(child) is str:
+                    size += _STR_SZ + len(child)
+                else:
+                    stack.append(child)
+        elif type(item) is list:
+            for child in item:
+                if type(child) is str:
+                    size += _STR_SZ + len(child)
+                else:
+                    stack.append(child)
+
+    return size
+
+
+class LruCache:
+    # Least recently used entries are evicted once the total size of the
+    # entries is over max_size, an entry bigger than max_size is not kept
+    def __init__(
+        self,
+        max_size: int,
+        get_size: t.Callable[[t.Any], int] = get_result_size,
+    ) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self._get_size = get_size
+        self._entries: OrderedDict[t.Hashable, t.Tuple[t.Any, int]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: t.Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: t.Hashable, default: t.Any = None) -> t.Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: t.Hashable, value: t.Any) -> None:
+        self.pop(key)
+
+        size = self._get_size(value)
+        if size > self.max_size:
+            return
+
+        self._entries[key] = (value, size)
+        self.size += size
+
+        while self.size > self.max_size:
+            __, evicted = self._entries.popitem(last=False)
+            self.size -= evicted[1]
+            self.evictions += 1
+
+    def pop(self, key: t.Hashable) -> t.Any:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+
+        self.size -= entry[1]
+        return entry[0]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ParseCache:
+    # Token stores of parsed configs kept as files of cache_dir, named by the
+    # hash of the parser id and the config lines. Files are written to a
+    # temporary file then renamed, so processes sharing the directory never
+    # read a partial file. The least recently loaded files are removed once
+    # the files are over max_size bytes
+    SUFFIX = ".tree"
+    TMP_SUFFIX = ".tmp"
+
+    # Files are evicted down to this part of max_size, the directory is then
+    # not scanned again before more files are saved
+    EVICT_RATIO = 0.75
+
+    # Temporary files older than this were left by a writer that crashed
+    TMP_MAX_AGE = 60 * 60
+
+    def __init__(self, cache_dir: str, max_size: int = 512 * 1024 * 1024) -> None:
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+        # Bytes of the files as of the last scan plus the files saved since,
+        # the files saved by other processes are counted at the next scan
+        self.size = 0
+        self.evict()
+
+        # Threads saving the stores given to save_later()
+        self._saves: t.List[threading.Thread] = []
+        self._saves_lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # The saves pending in this process are not handed to another one
+        state = self.__dict__.copy()
+        state["_saves"] = []
+        state["_saves_lock"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._saves_lock = threading.Lock()
+
+    @staticmethod
+    def get_key(parser_id: str, lines: t.Sequence[str]) -> str:
+        digest = hashlib.sha256(f"{parser_id}\0{FORMAT_VERSION}\0".encode())
+        digest.update("\0".join(lines).encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def load(self, key: str) -> None | TokenStore:
+        path = self._get_path(key)
+        try:
+            with open(path, "rb") as fd:
+                store = TokenStore.from_bytes(fd.read())
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cannot load cached tree '{path}': {e}")
+            self.misses += 1
+            return None
+
+        # Loading makes the file the most recently used one, the store is
+        # still used when another process removed the file meanwhile
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return store
+
+    def save(self, key: str, store: TokenStore) -> None:
+        # A failing write only leaves the config uncached
+        data = store.to_bytes()
+        if len(data) > self.max_size:
+            return
+
+        tmp_path = ""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=self.TMP_SUFFIX)
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(data)
+            os.replace(tmp_path, self._get_path(key))
+        except OSError as e:
+            logger.warning(f"Cannot save cached tree in '{self.cache_dir}': {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        self.size += len(data)
+        if self.size > self.max_size:
+            self.evict()
+
+    def save_later(
+        self, key: str, build: t.Callable[[], TokenStore]
+    ) -> threading.Thread:
+        # The store is built and saved by a thread of its own, the caller must
+        # not change what build() reads until the thread is joined. The
+        # thread ends with the save, so no thread is left to a fork()
+        thread = threading.Thread(
+            target=lambda: self.save(key, build()), name="ParseCache"
+        )
+        with self._saves_lock:
+            self._saves = [s for s in self._saves if s.is_alive()]
+            self._saves.append(thread)
+        thread.start()
+        return thread
+
+    def wait(self) -> None:
+        # Returns once the stores given to save_later() are written
+        with self._saves_lock:
+            saves = self._saves
+            self._saves = []
+        for thread in saves:
+            thread.join()
+
+    def _scan(self) -> t.List[t.Tuple[float, int, str]]:
+        # Cache files as (mtime, size, path), the old temporary files are
+        # removed on the way
+        files = []
+        expired = time.time() - self.TMP_MAX_AGE
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                is_tmp = entry.name.endswith(self.TMP_SUFFIX)
+                if not is_tmp and not entry.name.endswith(self.SUFFIX):
+                    continue
+
+                # Another process may have removed it already
+                try:
+                    stat = entry.stat()
+                    if is_tmp and stat.st_mtime < expired:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+
+                if not is_tmp:
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        return files
+
+    def evict(self) -> None:
+        # Least recently used files are removed when the files are over
+        # max_size, down to EVICT_RATIO of it
+        files = self._scan()
+        size = sum(f_size for __, f_size, path in files)
+
+        if size > self.max_size:
+            target_size = self.max_size * self.EVICT_RATIO
+            for __, f_size, path in sorted(files):
+                if size <= target_size:
+                    break
+
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                size -= f_size
+
+        self.size = size
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
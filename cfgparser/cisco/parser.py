@@ -3,23 +3,54 @@ from __future__ import annotations
 import typing as t
 
 from cfgparser.base.base import BaseParser
+from cfgparser.base.cache import ParseCache
 from cfgparser.cisco import tokenizer
 from cfgparser.tree.finder import Finder
+from cfgparser.tree.pool import StringPool
 from cfgparser.tree.token import Token
 
 
+class CiscoLine:
+    def __init__(self, words: t.List[str], parent: None | CiscoLine = None) -> None:
+        self.words = words
+        self.parent = parent
+
+        # The words of a plain line and of its parents cannot start a builder
+        # token, so childs can be scanned from the line token only
+        self.is_plain: bool = not tokenizer.has_builder_keyword(words) and (
+            parent is None or parent.is_plain
+        )
+
+        self.last_word_token: None | Token = None
+        self.token: None | Token = None
+
+    def get_all_words(self) -> t.List[str]:
+        lines = []
+
+        line: None | CiscoLine = self
+        while line:
+            lines.append(line.words)
+            line = line.parent
+
+        return [w for words in reversed(lines) for w in words]
+
+
 class CiscoTree:
-    def __init__(self):
-        self.tokens = []
-        self.indent_step_sz = tokenizer.get_indent_step_sz()
+    def __init__(self, pool: None | StringPool = None) -> None:
+        self.tokens: t.List[Token] = []
+        self.pool = pool if pool is not None else StringPool()
+        self.indent_step_sz = tokenizer.DEFAULT_INDENT_STEP_SZ
+
+        # Root tokens by name, a builder token can add a root with the name
+        # of an existing one when their values differ
+        self._roots: t.Dict[str, t.List[Token]] = {}
 
     def set_indent_step_sz(self, step_sz: int) -> None:
         self.indent_step_sz = step_sz
-        tokenizer.set_indent_step_sz(step_sz)
 
     @staticmethod
     def _tokenize_last_word(name: str, curr_token: Token, indent_sz: int) -> None:
-        if not curr_token.value and not curr_token.childs:
+        if not curr_token.value and not curr_token.has_childs:
             curr_token.value = name
 
         elif curr_token.value and name != curr_token.value:
@@ -37,11 +68,9 @@ class CiscoTree:
 
     @staticmethod
     def _next_token(name: str, curr_token: Token, indent_sz: int) -> Token:
-        for c in curr_token.childs.values():
-            if isinstance(c, Token) and c.name == name:
-                next_token = c
-                break
-        else:
+        # Childs are always stored with their name as key
+        next_token = curr_token.childs.get(name)
+        if not isinstance(next_token, Token):
             if curr_token.value == name:
                 curr_token.value = None
             curr_token.childs[name] = Token(name, None, indent_sz)
@@ -49,14 +78,21 @@ class CiscoTree:
 
         return next_token
 
+    def _add_root_token(self, token: Token) -> None:
+        self.tokens.append(token)
+        self._roots.setdefault(token.name, []).append(token)
+
+    def graft(self, tokens: t.List[Token]) -> None:
+        for token in tokens:
+            self._add_root_token(token)
+
     def _get_root_token(self, name: str, indent_sz: int) -> Token:
-        for tkn in self.tokens:
-            if tkn.name == name:
-                root_token = tkn
-                break
-        else:
-            root_token = Token(name, None, indent_sz)
-            self.tokens.append(root_token)
+        roots = self._roots.get(name)
+        if roots:
+            return roots[0]
+
+        root_token = Token(name, None, indent_sz)
+        self._add_root_token(root_token)
 
         return root_token
 
@@ -66,68 +102,113 @@ class CiscoTree:
         token = None
         merged = False
 
-        token = tokenizer.create_token(words, indent_sz)
+        token = tokenizer.create_token(words, indent_sz, self.indent_step_sz)
         if token:
             for dst_token in parents:
-                merged = Finder.recurse_merge_token(dst_token, token)
+                if Finder.recurse_merge_token(dst_token, token):
+                    merged = True
+                    break
 
         return token, merged
 
-    def scan_line(self, line):
-        words = line.strip().split(" ")
-        words = [w for w in words if w]
+    def _scan_childs(self, words: t.List[str], curr_token: Token) -> None | Token:
+        # Return the token holding the last word, None if a builder token
+        # ended the scan
+        for idx, word in enumerate(words):
+            w = word.strip()
+            indent_sz = self.indent_step_sz
 
-        if not words:
-            return None
+            token, merged = None, False
+            if tokenizer.is_builder_keyword(word):
+                token, merged = self._lex_token(words[idx:], indent_sz, [curr_token])
+
+            if token and merged:
+                return None
+
+            if token:
+                if curr_token.value and w != curr_token.value:
+                    curr_token.childs[curr_token.value] = Token(
+                        curr_token.value, None, indent_sz
+                    )
+                    curr_token.value = None
+                curr_token.childs[w] = token
+                return None
+
+            if idx == len(words) - 1:
+                self._tokenize_last_word(w, curr_token, indent_sz)
+                return curr_token
 
-        token, merged = self._lex_token(words, 0, self.tokens)
+            curr_token = self._next_token(w, curr_token, indent_sz)
+
+        return None
+
+    def _scan_root(self, words: t.List[str]) -> None | Token:
+        # Only the roots with the same name can take a builder token
+        token, merged = self._lex_token(words, 0, self._roots.get(words[0], []))
         if token and merged:
             return None
 
         if token:
-            self.tokens.append(token)
+            self._add_root_token(token)
             return None
 
         # Get root with the first word
-        w = words[0].strip()
-        curr_token = self._get_root_token(w, 0)
+        curr_token = self._get_root_token(words[0].strip(), 0)
+
+        return self._scan_childs(words[1:], curr_token)
+
+    def _resolve_line_token(self, line: CiscoLine) -> Token:
+        # Token of a line is created by its first child line, like scanning
+        # the line words with the child words behind them
+        if not line.token:
+            if line.last_word_token:
+                line.token = self._next_token(
+                    line.words[-1].strip(), line.last_word_token, self.indent_step_sz
+                )
+            else:
+                line.token = self._get_root_token(line.words[0].strip(), 0)
+
+        return line.token
 
-        if len(words) <= 1:
+    def scan_words(
+        self, words: t.List[str], parent: None | CiscoLine = None
+    ) -> None | CiscoLine:
+        if not words:
             return None
 
-        words = words[1:]
-        indent_ctr = 1
-        while words:
-            w = words[0].strip()
-            indent_sz = indent_ctr * self.indent_step_sz
+        words = self.pool.intern_words(words)
+        line = CiscoLine(words, parent)
 
-            token, merged = self._lex_token(words, indent_sz, [curr_token])
-            if token and merged:
-                break
+        if parent and parent.is_plain:
+            line.last_word_token = self._scan_childs(
+                words, self._resolve_line_token(parent)
+            )
+        else:
+            line.last_word_token = self._scan_root(line.get_all_words())
 
-            if token:
-                if curr_token.value and w != curr_token.value:
-                    curr_token.childs[curr_token.value] = Token(
-                        curr_token.value, None, indent_sz
-                    )
-                    curr_token.value = None
-                curr_token.childs[w] = token
-                break
+        return line
 
-            if len(words) == 1:
-                self._tokenize_last_word(w, curr_token, indent_sz)
-                break
+    def scan_line(self, line):
+        words = line.strip().split(" ")
+        words = [w for w in words if w]
 
-            curr_token = self._next_token(w, curr_token, indent_sz)
-            words = words[1:]
+        self.scan_words(words)
 
         return None
 
 
 class CiscoParser(BaseParser):
-    def __init__(self) -> None:
-        super().__init__()
-        self._tree = CiscoTree()
+    def __init__(
+        self,
+        pool: None | StringPool = None,
+        cache: None | ParseCache = None,
+        result_cache_sz: int = 0,
+    ) -> None:
+        super().__init__(pool, cache, result_cache_sz)
+        self._tree = self._create_tree()
+
+    def _create_tree(self) -> CiscoTree:
+        return CiscoTree(self.pool)
 
     @staticmethod
     def identify(lines: t.Iterable) -> bool:
@@ -146,18 +227,14 @@ class CiscoParser(BaseParser):
                 break
 
     @staticmethod
-    def _reposition_line_start_with_no(line: str, indent_sz: int) -> str:
-        ret = line
-        clean_line = line.strip()
-
-        if clean_line.startswith("no "):
-            parts = clean_line.split(" ")
-            parts = parts[1:] + [parts[0]]
+    def _tokenize_line(line: str) -> t.List[str]:
+        words = [w for w in line.strip().split(" ") if w]
 
-            indent_space = " " * indent_sz
-            ret = indent_space + " ".join(parts)
+        # Reposition "no" at the end of the line words
+        if words and words[0] == "no":
+            words = words[1:] + words[:1]
 
-        return ret
+        return words
 
     @staticmethod
     def _scan_banner(
@@ -178,11 +255,11 @@ class CiscoParser(BaseParser):
 
     def _construct_parent_lines(
         self,
-        parent_lines: t.List[str],
-        parent_line: str,
+        parent_lines: t.List[None | CiscoLine],
+        parent_line: None | CiscoLine,
         curr_indent_sz: int,
         prev_indent_sz: int,
-    ) -> t.List[str]:
+    ) -> t.List[None | CiscoLine]:
         indent_step_sz = self._tree.indent_step_sz
 
         # Identify indent step size
@@ -203,9 +280,9 @@ class CiscoParser(BaseParser):
 
         return parent_lines
 
-    def parse(self, lines: t.Iterable) -> None:
-        parent_lines: t.List[str] = []
-        parent_line = ""
+    def _parse_lines(self, lines: t.Iterable) -> None:
+        parent_lines: t.List[None | CiscoLine] = []
+        parent_line: None | CiscoLine = None
         prev_indent_sz = 0
 
         # Loop untile line that can be parsed
@@ -247,15 +324,13 @@ class CiscoParser(BaseParser):
                 parent_lines, parent_line, curr_indent_sz, prev_indent_sz
             )
 
-            # Reposition line "no" in line text
-            line = self._reposition_line_start_with_no(line, curr_indent_sz)
-
-            # Combine parent line and current line, in here text shall have no indent
-            curr_line = " ".join(parent_lines + [line])
-
-            # Scan line by separating words
-            self._tree.scan_line(curr_line)
+            # Scan line words from the closest parent line
+            words = self._tokenize_line(line)
+            parent = parent_lines[-1] if parent_lines else None
+            curr_line = self._tree.scan_words(words, parent)
 
             # Update indent and parent line tracker
             prev_indent_sz = curr_indent_sz
-            parent_line = line
+            parent_line = curr_line
+
+        self._finish_parse()
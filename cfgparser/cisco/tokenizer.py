@@ -1,28 +1,42 @@
 from __future__ import annotations
 
+import functools
 import ipaddress
-import typing as t
+import re
 
 from cfgparser.tree.token import AbstractTokenBuilder
 from cfgparser.tree.token import Token
+from cfgparser.tree.token import TokenBuilderRegistry
 
+DEFAULT_INDENT_STEP_SZ = 1
 
-class _Attr:
-    indent_step_size: int = 1
+_IPV4_PATTERN = re.compile(
+    r"(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])"
+    r"(?:\.(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])){3}"
+)
 
 
-_attr = _Attr()
-
+@functools.lru_cache(maxsize=4096)
+def is_ip_address(text: str) -> bool:
+    # Same result as ipaddress.ip_address() without building any object
+    # for IPv4, only IPv6 candidates go through the ipaddress module
+    if _IPV4_PATTERN.fullmatch(text):
+        return True
 
-def get_indent_step_sz() -> int:
-    return _attr.indent_step_size
+    if ":" not in text:
+        return False
 
+    try:
+        ipaddress.ip_address(text)
+    except ValueError:
+        return False
 
-def set_indent_step_sz(indent_sz: int) -> None:
-    _attr.indent_step_size = indent_sz
+    return True
 
 
 class BannerToken(AbstractTokenBuilder):
+    keywords = (("banner", None),)
+
     @staticmethod
     def check_rule(words: list) -> bool:
         if len(words) >= 2 and words[0] == "banner" and words[1] in ["login", "motd"]:
@@ -31,11 +45,13 @@ class BannerToken(AbstractTokenBuilder):
         return False
 
     @staticmethod
-    def create(words: list, indent: int) -> Token:
+    def create(
+        words: list, indent: int, indent_step_sz: int = DEFAULT_INDENT_STEP_SZ
+    ) -> Token:
         banner_token = Token(words[0], None, indent)
         banner_token.is_container = True
 
-        child_token = Token(words[1], None, indent + _attr.indent_step_size)
+        child_token = Token(words[1], None, indent + indent_step_sz)
         banner_token.childs[words[1]] = child_token
 
         if len(words) > 2:
@@ -45,6 +61,8 @@ class BannerToken(AbstractTokenBuilder):
 
 
 class IfaceIpAddressToken(AbstractTokenBuilder):
+    keywords = (("address", 3),)
+
     @staticmethod
     def check_rule(words: list) -> bool:
         if len(words) != 3:
@@ -53,27 +71,19 @@ class IfaceIpAddressToken(AbstractTokenBuilder):
         if words[0] != "address":
             return False
 
-        try:
-            ipaddress.ip_address(words[1])
-        except ValueError:
-            return False
-
-        try:
-            ipaddress.ip_address(words[2])
-        except ValueError:
-            return False
-
-        return True
+        return is_ip_address(words[1]) and is_ip_address(words[2])
 
     @staticmethod
-    def create(words: list, indent: int) -> Token:
+    def create(
+        words: list, indent: int, indent_step_sz: int = DEFAULT_INDENT_STEP_SZ
+    ) -> Token:
         addr_text, ipval, ipmask = words
 
         passwd_token = Token(addr_text, None, indent)
         passwd_token.is_container = True
 
-        ipaddr_token = Token("ipaddress", ipval, indent + _attr.indent_step_size)
-        ipmask_token = Token("netmask", ipmask, indent + _attr.indent_step_size)
+        ipaddr_token = Token("ipaddress", ipval, indent + indent_step_sz)
+        ipmask_token = Token("netmask", ipmask, indent + indent_step_sz)
         passwd_token.childs["ipaddress"] = ipaddr_token
         passwd_token.childs["netmask"] = ipmask_token
 
@@ -81,6 +91,8 @@ class IfaceIpAddressToken(AbstractTokenBuilder):
 
 
 class UserPasswordToken(AbstractTokenBuilder):
+    keywords = (("password", 3),)
+
     @staticmethod
     def check_rule(words: list) -> bool:
         if len(words) == 3 and words[0] == "password" and str(words[1]).isdigit():
@@ -89,14 +101,16 @@ class UserPasswordToken(AbstractTokenBuilder):
         return False
 
     @staticmethod
-    def create(words: list, indent: int) -> Token:
+    def create(
+        words: list, indent: int, indent_step_sz: int = DEFAULT_INDENT_STEP_SZ
+    ) -> Token:
         passwd_text, passwd_type, passwd_val = words
 
         passwd_token = Token(passwd_text, None, indent)
         passwd_token.is_container = True
 
-        type_token = Token("type", passwd_type, indent + _attr.indent_step_size)
-        value_token = Token("value", passwd_val, indent + _attr.indent_step_size)
+        type_token = Token("type", passwd_type, indent + indent_step_sz)
+        value_token = Token("value", passwd_val, indent + indent_step_sz)
         passwd_token.childs["type"] = type_token
         passwd_token.childs["value"] = value_token
 
@@ -104,6 +118,8 @@ class UserPasswordToken(AbstractTokenBuilder):
 
 
 class UserPrivilegeToken(AbstractTokenBuilder):
+    keywords = (("privilege", 5),)
+
     @staticmethod
     def check_rule(words: list) -> bool:
         if len(words) == 5 and words[0] == "privilege" and words[2] == "secret":
@@ -112,19 +128,21 @@ class UserPrivilegeToken(AbstractTokenBuilder):
         return False
 
     @staticmethod
-    def create(words: list, indent: int) -> Token:
+    def create(
+        words: list, indent: int, indent_step_sz: int = DEFAULT_INDENT_STEP_SZ
+    ) -> Token:
         priv_text, priv_type, secret_text, secret_type, secret_val = words
         priv_token = Token(priv_text, None, indent)
         priv_token.is_container = True
 
-        priv_type_token = Token("type", priv_type, indent + _attr.indent_step_size)
+        priv_type_token = Token("type", priv_type, indent + indent_step_sz)
 
-        secret_token = Token(secret_text, None, indent + _attr.indent_step_size)
+        secret_token = Token(secret_text, None, indent + indent_step_sz)
         secret_token.is_container = True
 
-        secret_type_token = Token("type", secret_type, indent + (_attr.indent_step_size * 2))
+        secret_type_token = Token("type", secret_type, indent + (indent_step_sz * 2))
         secret_value_token = Token(
-            "value", secret_val, indent + (_attr.indent_step_size * 2)
+            "value", secret_val, indent + (indent_step_sz * 2)
         )
         secret_token.childs["type"] = secret_type_token
         secret_token.childs["value"] = secret_value_token
@@ -136,6 +154,8 @@ class UserPrivilegeToken(AbstractTokenBuilder):
 
 
 class DescriptionToken(AbstractTokenBuilder):
+    keywords = (("description", None),)
+
     @staticmethod
     def check_rule(words: list) -> bool:
         if len(words) >= 2 and words[0] == "description":
@@ -144,28 +164,42 @@ class DescriptionToken(AbstractTokenBuilder):
         return False
 
     @staticmethod
-    def create(words: list, indent: int) -> Token:
+    def create(
+        words: list, indent: int, indent_step_sz: int = DEFAULT_INDENT_STEP_SZ
+    ) -> Token:
         desc_token = Token("description", " ".join(words[1:]), indent)
 
         return desc_token
 
 
-__LIST_OF_BUILDER: t.List[AbstractTokenBuilder] = [
-    BannerToken(),
-    UserPrivilegeToken(),
-    UserPasswordToken(),
-    IfaceIpAddressToken(),
-    # Description must be the last for matching
-    # Because the check rule is a bit greedy
-    DescriptionToken(),
-]
+__BUILDER_REGISTRY = TokenBuilderRegistry(
+    [
+        BannerToken(),
+        UserPrivilegeToken(),
+        UserPasswordToken(),
+        IfaceIpAddressToken(),
+        DescriptionToken(),
+    ]
+)
 
 
-def create_token(words: list, indent: int) -> Token | None:
-    for builder in __LIST_OF_BUILDER:
-        if builder.check_rule(words):
-            return builder.create(words, indent)
+def register_builder(builder: AbstractTokenBuilder) -> None:
+    __BUILDER_REGISTRY.register(builder)
 
-    return None
+
+def is_builder_keyword(word: str) -> bool:
+    return __BUILDER_REGISTRY.is_keyword(word)
+
+
+def has_builder_keyword(words: list) -> bool:
+    return __BUILDER_REGISTRY.has_keyword(words)
+
+
+def create_token(
+    words: list, indent: int, indent_step_sz: int = DEFAULT_INDENT_STEP_SZ
+) -> Token | None:
+    builder = __BUILDER_REGISTRY.find(words)
+    if builder:
+        return builder.create(words, indent, indent_step_sz)
 
     return None
@@ -2,39 +2,69 @@ from __future__ import annotations
 
 import re
 import typing as t
+from concurrent.futures import ProcessPoolExecutor
 
 from cfgparser.base.base import BaseParser
+from cfgparser.base.cache import ParseCache
 from cfgparser.nokia.classic import tokenizer
+from cfgparser.path.path import DataPath
 from cfgparser.tree.finder import Finder
+from cfgparser.tree.pool import StringPool
+from cfgparser.tree.store import StoreToken
+from cfgparser.tree.store import StoreTree
+from cfgparser.tree.store import TokenStore
 from cfgparser.tree.token import Token
 
+# A word is either a double quoted string or a run of non space characters
+_WORD_PATTERN = re.compile(r'\s*(?:"(.+?)"|([^ ]+))')
 
-class NokiaTree:
-    def __init__(self) -> None:
-        self.tokens: t.List[Token] = []
 
-    @staticmethod
-    def _tokenize_line(text: str) -> list:
-        words = []
-        text = text.strip()
+def _index_childs(token: Token) -> t.Dict[tuple, str]:
+    # Keys of the direct childs by their attributes, like Finder.find_token()
+    # matches them. Builders store some childs under another key than their
+    # id, "customer" for "customer 1"
+    founds: t.Dict[tuple, str] = {}
+    if token.has_childs:
+        for key, c in token.childs.items():
+            founds.setdefault((c.name, c.indent, c.value), key)
+    return founds
+
 
-        while text:
-            if text.startswith('"'):
-                match = re.match(r"\"(.+?)\"", text)
+def _thaw_childs(token: Token) -> None:
+    # Store views under the token are replaced by tokens
+    stack = [token]
+    while stack:
+        token = stack.pop()
+        if not token.has_childs:
+            continue
 
-                if match:
-                    text = text.replace(match.group(0), "", 1).lstrip()
+        childs = token.childs
+        for key, c in childs.items():
+            if isinstance(c, StoreToken):
+                c = childs[key] = c.to_token()
+            stack.append(c)
 
-                    # Remove double quotes before storing
-                    words.append(match.group(0).replace('"', ""))
-                    continue
 
-            parts = text.split(" ", 1)
-            if parts:
-                words.append(parts[0])
-                text = text.replace(parts[0], "", 1).lstrip()
+class NokiaTree:
+    def __init__(self, pool: None | StringPool = None) -> None:
+        self.tokens: t.List[Token] = []
+        self.pool = pool if pool is not None else StringPool()
+
+        # Open contexts keyed by indent, the last item of each stack is the
+        # latest token at that indent still waiting for its "exit"
+        self._contexts: t.Dict[int, t.List[Token]] = {}
 
-        return words
+        # Set when store views were grafted, see graft_store()
+        self.has_views = False
+
+    @staticmethod
+    def _tokenize_line(text: str) -> list:
+        # Only one group is set on each match, remove double quotes of a
+        # quoted string before storing
+        return [
+            quoted.replace('"', "") if quoted else word
+            for quoted, word in _WORD_PATTERN.findall(text.strip())
+        ]
 
     def scan_line(self, line) -> None | Token:
         line_clean = line.strip()
@@ -47,49 +77,263 @@ class NokiaTree:
         line_trimmed = line.rstrip()
         indent = len(line_trimmed) - len(line_trimmed.lstrip())
 
-        words = self._tokenize_line(line_clean)
+        words = self.pool.intern_words(self._tokenize_line(line_clean))
 
         # Calling a static class
         token = tokenizer.create_token(words, indent)
 
         if not token.name.startswith("exit"):
             self.tokens.append(token)
+            self._contexts.setdefault(indent, []).append(token)
 
         return token
 
-    def backparse_from_token(self, indent_sz: int) -> None:
+    def scan_lines(self, lines: t.Iterable) -> bool:
+        # Return False when an "exit" did not find the token to close
+        is_closed = True
+
+        for line in lines:
+            token = self.scan_line(line)
+            if token and token.name.startswith("exit"):
+                is_closed = self.backparse_from_token(token.indent) and is_closed
+
+        return is_closed
+
+    def backparse_from_token(self, indent_sz: int) -> bool:
+        contexts = self._contexts.get(indent_sz)
+        if not contexts:
+            return False
+
+        parent = contexts[-1]
+
+        # Pop every token opened after the parent, deeper tokens are the
+        # childs and the shallower ones are kept as they are not closed yet.
+        # Attributes of the childs are read once, they are slower on views
         childs = []
-        parent: Token | None = None
+        keeps = []
+        while self.tokens[-1] is not parent:
+            token = self.tokens.pop()
+            indent = token.indent
+            if indent > indent_sz:
+                self._contexts[indent].pop()
+                childs.append((token, (token.name, indent, token.value)))
+            else:
+                keeps.append(token)
+        self.tokens.extend(reversed(keeps))
 
-        for token in reversed(self.tokens):
-            if indent_sz < token.indent:
-                childs.append(token)
-            elif indent_sz == token.indent:
-                parent = token
-                break
+        # Childs at the shallowest indent can only match a direct child of
+        # the parent, deeper ones come from a missing "exit" and need the
+        # full subtree search
+        level = min(
+            [attrs[1] for __, attrs in childs]
+            + [c.indent for c in parent.iter_childs()],
+            default=0,
+        )
 
-        if not parent:
-            return None
+        # A token found by the full search is merged into, the views under
+        # the parent are made tokens first
+        if self.has_views and any(attrs[1] != level for __, attrs in childs):
+            _thaw_childs(parent)
+
+        siblings = _index_childs(parent)
 
         parent.is_container = True
-        for c in childs:
-            existing_c = Finder(parent).find_token(c)
+        for c, attrs in childs:
+            if attrs[1] == level:
+                key = siblings.get(attrs)
+                existing_c = None if key is None else parent.childs[key]
+                if isinstance(existing_c, StoreToken):
+                    existing_c = parent.childs[key] = existing_c.to_token()
+            else:
+                existing_c = Finder(parent).find_token(c)
+
             if existing_c:
                 Finder.recurse_merge_token(existing_c, c)
+                continue
+
+            # A child replaced under the same key may leave others with its
+            # attributes
+            c_id = c.id
+            is_replaced = c_id in parent.childs
+            parent.childs[c_id] = c
+            if is_replaced:
+                siblings = _index_childs(parent)
+            else:
+                siblings.setdefault(attrs, c_id)
+
+        return True
+
+    def graft(self, tokens: t.List[Token]) -> None:
+        for token in tokens:
+            self.tokens.append(token)
+            self._contexts.setdefault(token.indent, []).append(token)
+
+    def graft_store(self, store: TokenStore) -> None:
+        # Roots of the store are grafted as read only views, a view becomes a
+        # token only when another section is merged into it
+        indents = store.indents
+        for idx in store.roots:
+            token = t.cast(Token, StoreToken(store, idx))
+            self.tokens.append(token)
+            self._contexts.setdefault(indents[idx], []).append(token)
+        self.has_views = True
+
+    def thaw(self) -> None:
+        # Every view is replaced by a token, so lines can be scanned again
+        thaweds = {}
+        for token in self.tokens:
+            if isinstance(token, StoreToken):
+                thaweds[id(token)] = token.to_token()
             else:
-                parent.childs[c.id] = c
+                thaweds[id(token)] = token
+            _thaw_childs(thaweds[id(token)])
+
+        self.tokens = [thaweds[id(token)] for token in self.tokens]
+        self._contexts = {
+            indent: [thaweds[id(token)] for token in contexts]
+            for indent, contexts in self._contexts.items()
+        }
+        self.has_views = False
+
+    def pop_section(self, indent_sz: int) -> None | t.Tuple[DataPath, Token]:
+        self.backparse_from_token(indent_sz)
+
+        contexts = self._contexts.get(indent_sz)
+        if not contexts:
+            return None
+
+        # Detach the closed section so it is not kept in the tree
+        section = contexts.pop()
+        for idx in range(len(self.tokens) - 1, -1, -1):
+            if self.tokens[idx] is section:
+                del self.tokens[idx]
+                break
 
-        self.tokens = [token for token in self.tokens if token not in childs]
-        return None
+        # The latest open context of each upper indent is the section parent
+        datapath = DataPath(
+            [
+                contexts[-1].id
+                for indent, contexts in sorted(self._contexts.items())
+                if indent < indent_sz and contexts
+            ]
+        )
+        datapath.add(section.id)
+
+        return datapath, section
 
     def is_complete(self) -> bool:
         return len(self.tokens) <= 1
 
 
+# Config text of parse_parallel(), set in each worker process
+_worker_text = ""
+
+
+def _init_worker(text: str) -> None:
+    global _worker_text
+    _worker_text = text
+
+
+def _get_line_indent(line: str) -> int:
+    # Indent of a config line, -1 for the lines the parser skips
+    line_trimmed = line.rstrip()
+    line_clean = line_trimmed.lstrip()
+    if not line_clean or line_clean.startswith("#") or line.startswith("echo"):
+        return -1
+    return len(line_trimmed) - len(line_clean)
+
+
+def _is_chunk_start(line: str) -> bool:
+    # Chunks start at a line of indent 0 or at a section, an "exit" or a
+    # "no" line at the section indent ends the previous section
+    indent = _get_line_indent(line)
+    if indent == tokenizer.INDENT_SZ:
+        return not line.lstrip().startswith(("exit", "no "))
+    return indent == 0
+
+
+def _find_line(text: str, prefix: str, pos: int) -> int:
+    # Offset of the first line from pos starting with prefix, or the end
+    if text.startswith(prefix, pos):
+        return pos
+    found = text.find("\n" + prefix, pos)
+    return len(text) if found == -1 else found + 1
+
+
+def _find_chunk_start(text: str, pos: int, end: int) -> int:
+    # Offset of the first chunk start from pos, end when there is none
+    if pos > 0 and text[pos - 1] != "\n":
+        pos = text.find("\n", pos, end) + 1 or end
+
+    while pos < end:
+        line_end = text.find("\n", pos, end)
+        if line_end == -1:
+            line_end = end
+        if _is_chunk_start(text[pos:line_end]):
+            return pos
+        pos = line_end + 1
+
+    return end
+
+
+def _parse_chunk(lines: t.List[str]) -> t.Tuple[bytes, bool]:
+    # A chunk is only self contained when every "exit" closes a token opened
+    # inside the chunk. Tokens are sent back as the bytes of a store, the
+    # parent grafts the store without making tokens
+    tree = NokiaTree()
+    is_closed = tree.scan_lines(lines)
+
+    return StoreTree.from_tokens(tree.tokens).store.to_bytes(), is_closed
+
+
+def _parse_range(start: int, end: int, finish: int) -> t.Tuple[list, bool]:
+    # Both offsets are moved to the next chunk start, as every worker does,
+    # so the ranges follow each other. Lines of indent 0 are sent back as
+    # they are for the parent to scan in order, the chunks between them as
+    # stores
+    text = _worker_text
+    start = _find_chunk_start(text, start, finish)
+    end = _find_chunk_start(text, end, finish)
+
+    segments: t.List[bytes | str] = []
+    chunk: t.List[str] = []
+    for line in text[start:end].split("\n"):
+        indent = _get_line_indent(line)
+        if indent > 0:
+            chunk.append(line)
+            continue
+        if indent < 0:
+            continue
+
+        if chunk:
+            data, is_closed = _parse_chunk(chunk)
+            if not is_closed:
+                return [], False
+            segments.append(data)
+            chunk = []
+        segments.append(line)
+
+    if chunk:
+        data, is_closed = _parse_chunk(chunk)
+        if not is_closed:
+            return [], False
+        segments.append(data)
+
+    return segments, True
+
+
 class NokiaClassicParser(BaseParser):
-    def __init__(self) -> None:
-        super().__init__()
-        self._tree = NokiaTree()
+    def __init__(
+        self,
+        pool: None | StringPool = None,
+        cache: None | ParseCache = None,
+        result_cache_sz: int = 0,
+    ) -> None:
+        super().__init__(pool, cache, result_cache_sz)
+        self._tree = self._create_tree()
+
+    def _create_tree(self) -> NokiaTree:
+        return NokiaTree(self.pool)
 
     @staticmethod
     def identify(lines: t.Iterable) -> bool:
@@ -101,7 +345,8 @@ class NokiaClassicParser(BaseParser):
                 break
         return ret
 
-    def parse(self, lines: t.Iterable) -> None:
+    @staticmethod
+    def _iter_config_lines(lines: t.Iterable) -> t.Iterator[str]:
         # loop until start line detected
         for line in lines:
             if line.startswith("# TiMOS"):
@@ -112,6 +357,96 @@ class NokiaClassicParser(BaseParser):
             if line.startswith("# Finished"):
                 break
 
-            token = self._tree.scan_line(line)
-            if token and token.name.startswith("exit"):
-                self._tree.backparse_from_token(token.indent)
+            yield line
+
+    def _parse_lines(self, lines: t.Iterable) -> None:
+        self._tree.scan_lines(self._iter_config_lines(lines))
+        self._finish_parse()
+
+    def _thaw_tree(self) -> None:
+        # Views grafted by parse_parallel() become tokens before a parse
+        if isinstance(self._tree, NokiaTree) and self._tree.has_views:
+            self._tree.thaw()
+        super()._thaw_tree()
+
+    def parse_parallel(
+        self,
+        lines: t.Iterable,
+        workers: None | int = None,
+        chunk_sz: int = 20000,
+    ) -> None:
+        # The config text is cut in ranges of about chunk_sz lines by offset,
+        # each worker process finds the sections of its range and parses
+        # them. Stores sent back are grafted in order as views, and the
+        # "exit" of the lines of indent 0 then merges them like parse(). Only
+        # the views other sections are merged into become tokens
+        is_iterator = iter(lines) is lines
+        text = "\n".join(lines)
+
+        # Same lines as _iter_config_lines(), an iterator skips the header
+        begin = 0
+        if is_iterator:
+            header_end = text.find("\n", _find_line(text, "# TiMOS", 0))
+            begin = len(text) if header_end == -1 else header_end + 1
+        finish = _find_line(text, "# Finished", begin)
+
+        n_lines = text.count("\n", begin, finish) + 1
+        range_sz = max(1, (finish - begin) * chunk_sz // n_lines)
+        offsets = [*range(begin, finish, range_sz), finish]
+
+        tree = NokiaTree(self.pool)
+        is_closed = True
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(text,)
+        ) as executor:
+            futures = [
+                executor.submit(_parse_range, start, end, finish)
+                for start, end in zip(offsets, offsets[1:])
+            ]
+
+            for future in futures:
+                segments, is_closed = future.result()
+                if not is_closed:
+                    executor.shutdown(cancel_futures=True)
+                    break
+
+                for segment in segments:
+                    if isinstance(segment, str):
+                        tree.scan_lines([segment])
+                        continue
+
+                    store = TokenStore.from_bytes(segment)
+                    if self.pool is not None:
+                        store.strings = self.pool.intern_words(store.strings)
+                    tree.graft_store(store)
+
+        # An "exit" reached back to a previous chunk, parse serially instead
+        if not is_closed:
+            tree = NokiaTree(self.pool)
+            tree.scan_lines(text[begin:finish].split("\n"))
+
+        self._tree = tree
+        self._finish_parse()
+
+    def iter_sections(
+        self, lines: t.Iterable, depth: int = 1
+    ) -> t.Iterator[t.Tuple[DataPath, Token]]:
+        # Sections are yielded as soon as their "exit" is scanned and are not
+        # stored, only the tokens above the section depth are kept in a
+        # private tree. Repeated sections are yielded as they come and are
+        # not merged like in parse()
+        tree = NokiaTree(self.pool)
+        section_indent_sz = depth * tokenizer.INDENT_SZ
+
+        for line in self._iter_config_lines(lines):
+            token = tree.scan_line(line)
+            if not token or not token.name.startswith("exit"):
+                continue
+
+            if token.indent != section_indent_sz:
+                tree.backparse_from_token(token.indent)
+                continue
+
+            section = tree.pop_section(token.indent)
+            if section:
+                yield section
@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-import typing as t
-
 from cfgparser.tree.token import AbstractTokenBuilder
 from cfgparser.tree.token import Token
+from cfgparser.tree.token import TokenBuilderRegistry
 
 INDENT_SZ = 4
 
@@ -14,7 +13,7 @@ class DefaultTokenBuilder(AbstractTokenBuilder):
         return True
 
     @staticmethod
-    def create(words: list, indent: int) -> Token:
+    def create(words: list, indent: int, indent_step_sz: int = 1) -> Token:
         name = words[0]
         value = None
         params = []
@@ -32,6 +31,8 @@ class DefaultTokenBuilder(AbstractTokenBuilder):
 
 
 class ShutdownTokenBuilder(AbstractTokenBuilder):
+    keywords = (("shutdown", 1), ("no", 2))
+
     @staticmethod
     def check_rule(words: list) -> bool:
         if len(words) == 1 and words[0] == "shutdown":
@@ -43,7 +44,7 @@ class ShutdownTokenBuilder(AbstractTokenBuilder):
         return False
 
     @staticmethod
-    def create(words: list, indent: int) -> Token:
+    def create(words: list, indent: int, indent_step_sz: int = 1) -> Token:
         if len(words) == 1:
             name = "shutdown"
             value = "yes"
@@ -55,6 +56,8 @@ class ShutdownTokenBuilder(AbstractTokenBuilder):
 
 
 class BfdTokenBuilder(AbstractTokenBuilder):
+    keywords = (("bfd", None),)
+
     @staticmethod
     def check_rule(words: list) -> bool:
         if len(words) < 7:
@@ -73,7 +76,7 @@ class BfdTokenBuilder(AbstractTokenBuilder):
         return False
 
     @staticmethod
-    def create(words: list, indent: int) -> Token:
+    def create(words: list, indent: int, indent_step_sz: int = 1) -> Token:
         name, tx_val, __, rx_val, __, multi_val, __, type_val = words
 
         token = Token(name, None, indent)
@@ -89,6 +92,8 @@ class BfdTokenBuilder(AbstractTokenBuilder):
 
 
 class SdpTokenBuilder(AbstractTokenBuilder):
+    keywords = (("sdp", None),)
+
     @staticmethod
     def check_rule(words: list) -> bool:
         if len(words) < 4:
@@ -105,7 +110,7 @@ class SdpTokenBuilder(AbstractTokenBuilder):
         return False
 
     @staticmethod
-    def create(words: list, indent: int) -> Token:
+    def create(words: list, indent: int, indent_step_sz: int = 1) -> Token:
         name, value, delivery_type, __ = words
 
         token = Token(name, value, indent)
@@ -120,6 +125,8 @@ class SdpTokenBuilder(AbstractTokenBuilder):
 
 
 class SvcCustomerTokenBuilder(AbstractTokenBuilder):
+    keywords = (("customer", None),)
+
     @staticmethod
     def check_rule(words: list) -> bool:
         if len(words) < 5:
@@ -137,7 +144,7 @@ class SvcCustomerTokenBuilder(AbstractTokenBuilder):
         return False
 
     @staticmethod
-    def create(words: list, indent: int) -> Token:
+    def create(words: list, indent: int, indent_step_sz: int = 1) -> Token:
         name, value, __, cust_name, __ = words
 
         token = Token(name, value, indent)
@@ -150,6 +157,8 @@ class SvcCustomerTokenBuilder(AbstractTokenBuilder):
 
 
 class VplsTokenBuilder(AbstractTokenBuilder):
+    keywords = (("vpls", None),)
+
     @staticmethod
     def check_rule(words: list) -> bool:
         if len(words) < 7:
@@ -168,7 +177,7 @@ class VplsTokenBuilder(AbstractTokenBuilder):
         return False
 
     @staticmethod
-    def create(words: list, indent: int) -> Token:
+    def create(words: list, indent: int, indent_step_sz: int = 1) -> Token:
         name, value, __, vpls_name, __, cust_id, __ = words
 
         token = Token(name, value, indent)
@@ -182,6 +191,8 @@ class VplsTokenBuilder(AbstractTokenBuilder):
 
 
 class EpipeTokenBuilder(AbstractTokenBuilder):
+    keywords = (("epipe", None),)
+
     @staticmethod
     def check_rule(words: list) -> bool:
         if len(words) < 7:
@@ -200,7 +211,7 @@ class EpipeTokenBuilder(AbstractTokenBuilder):
         return False
 
     @staticmethod
-    def create(words: list, indent: int) -> Token:
+    def create(words: list, indent: int, indent_step_sz: int = 1) -> Token:
         name, value, __, epipe_name, __, cust_id, __ = words
 
         token = Token(name, value, indent)
@@ -213,19 +224,25 @@ class EpipeTokenBuilder(AbstractTokenBuilder):
         return token
 
 
-__LIST_OF_BUILDER: t.List[AbstractTokenBuilder] = [
-    ShutdownTokenBuilder(),
-    BfdTokenBuilder(),
-    SdpTokenBuilder(),
-    SvcCustomerTokenBuilder(),
-    VplsTokenBuilder(),
-    EpipeTokenBuilder(),
-]
+__BUILDER_REGISTRY = TokenBuilderRegistry(
+    [
+        ShutdownTokenBuilder(),
+        BfdTokenBuilder(),
+        SdpTokenBuilder(),
+        SvcCustomerTokenBuilder(),
+        VplsTokenBuilder(),
+        EpipeTokenBuilder(),
+    ]
+)
+
+
+def register_builder(builder: AbstractTokenBuilder) -> None:
+    __BUILDER_REGISTRY.register(builder)
 
 
 def create_token(words: list, indent: int) -> Token:
-    for builder in __LIST_OF_BUILDER:
-        if builder.check_rule(words):
-            return builder.create(words, indent)
+    builder = __BUILDER_REGISTRY.find(words)
+    if builder:
+        return builder.create(words, indent)
 
     return DefaultTokenBuilder.create(words, indent)
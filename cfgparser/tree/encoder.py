@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import functools
+import json
+import typing as t
+from json.encoder import encode_basestring_ascii
+
+from cfgparser.tree.token import Token
+
+
+@functools.lru_cache(maxsize=None)
+def _get_newline(indent: None | int, depth: int) -> str:
+    if indent is None:
+        return ""
+    return "\n" + " " * (indent * depth)
+
+
+def _encode_value(value: t.Any) -> str:
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    return json.dumps(value)
+
+
+class JsonEncoder:
+    # Write the JSON of the dicts made by Transformer.to_dict() straight from
+    # the tokens, the text is the same as json.dumps() of those dicts with
+    # the same indent and sort_keys
+    def __init__(self, indent: None | int = 4, sort_keys: bool = True) -> None:
+        self.indent = indent
+        self.sort_keys = sort_keys
+        self.item_separator = "," if indent is not None else ", "
+
+    def _get_entries(self, tokens: t.Iterable[Token]) -> t.List[t.Tuple[str, Token]]:
+        # Like the dict of to_dict(), a later token with the same key
+        # replaces the previous one
+        entries: t.Dict[str, Token] = {}
+        for token in tokens:
+            if token.is_container or token.has_childs:
+                entries[token.id] = token
+            else:
+                entries[token.name] = token
+
+        if self.sort_keys:
+            return sorted(entries.items(), key=lambda entry: entry[0])
+        return list(entries.items())
+
+    def _encode_leaf(self, token: Token, depth: int) -> str:
+        if token.has_params:
+            newline = _get_newline(self.indent, depth + 1)
+            values = [_encode_value(v) for v in [token.value, *token.params]]
+            return (
+                "["
+                + newline
+                + (self.item_separator + newline).join(values)
+                + _get_newline(self.indent, depth)
+                + "]"
+            )
+
+        if token.value:
+            return _encode_value(token.value)
+        return '""'
+
+    def _iter_object(
+        self, entries: t.List[t.Tuple[str, Token]], depth: int
+    ) -> t.Iterator[str]:
+        if not entries:
+            yield "{}"
+            return
+
+        yield "{"
+
+        # Only the entries of the open objects are kept while writing
+        stack = [(iter(entries), depth + 1)]
+        is_first = True
+        while stack:
+            it, depth = stack[-1]
+            entry = next(it, None)
+            if entry is None:
+                stack.pop()
+                yield _get_newline(self.indent, depth - 1) + "}"
+                continue
+
+            key, token = entry
+            head = "" if is_first else self.item_separator
+            head += _get_newline(self.indent, depth) + _encode_value(key) + ": "
+            is_first = False
+
+            if not token.is_container and not token.has_childs:
+                yield head + self._encode_leaf(token, depth)
+                continue
+
+            child_entries = self._get_entries(token.iter_childs())
+            if not child_entries:
+                yield head + "{}"
+                continue
+
+            yield head + "{"
+            stack.append((iter(child_entries), depth + 1))
+            is_first = True
+
+    def iter_dict(self, tokens: t.Iterable[Token]) -> t.Iterator[str]:
+        # JSON of Query(tokens).to_dict()
+        return self._iter_object(self._get_entries(tokens), 0)
+
+    def iter_list(self, tokens: t.Iterable[Token]) -> t.Iterator[str]:
+        # JSON of the list of Transformer(token).to_dict() of the tokens
+        is_first = True
+        for token in tokens:
+            head = "[" if is_first else self.item_separator
+            yield head + _get_newline(self.indent, 1)
+            yield from self._iter_object(self._get_entries([token]), 1)
+            is_first = False
+
+        yield "[]" if is_first else _get_newline(self.indent, 0) + "]"
+
+    def iter_ndjson(self, tokens: t.Iterable[Token]) -> t.Iterator[str]:
+        # One line of JSON for each token, always without indent
+        encoder = self
+        if self.indent is not None:
+            encoder = JsonEncoder(indent=None, sort_keys=self.sort_keys)
+
+        for token in tokens:
+            yield from encoder._iter_object(encoder._get_entries([token]), 0)
+            yield "\n"
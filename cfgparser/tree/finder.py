@@ -1,19 +1,31 @@
 from __future__ import annotations
 
-import copy
+import functools
+import re
 import typing as t
 
+from cfgparser.path.parser import DataPathParser
 from cfgparser.path.path import DataPath
+from cfgparser.path.path import Symbol
+from cfgparser.tree.index import PathIndex
+from cfgparser.tree.store import StoreToken
 from cfgparser.tree.token import Token
 from cfgparser.tree.transformer import Transformer
 
+# Childs of more tokens than this, searched at once, are scanned. Indexing
+# each of them would cost more than the scan
+INDEXED_FANOUT_SZ = 64
+
+# Nodes of a tree, store views are grafted by the parallel parse
+_TOKEN_TYPES = (Token, StoreToken)
+
 
 class Finder:
     def __init__(self, token: Token) -> None:
         self.token = token
 
     @staticmethod
-    def _is_attr_same(token_tree: Token, token: Token) -> bool:
+    def _is_attr_same(token_tree: Token, token: Token | StoreToken) -> bool:
         return (
             (token_tree.name == token.name)
             and (token_tree.indent == token.indent)
@@ -26,7 +38,7 @@ class Finder:
         if f_compare(token_tree, param):
             return token_tree
 
-        for c in token_tree.childs.values():
+        for c in token_tree.iter_childs():
             ret = self._recurse_find(c, param, f_compare)
             if ret:
                 return ret
@@ -38,9 +50,9 @@ class Finder:
         param: t.Any,
         f_compare: t.Callable,
     ) -> t.List[Token]:
-        return [c for c in token_tree.childs.values() if f_compare(c, param)]
+        return [c for c in token_tree.iter_childs() if f_compare(c, param)]
 
-    def is_attr_same(self, token: Token) -> bool:
+    def is_attr_same(self, token: Token | StoreToken) -> bool:
         return self._is_attr_same(self.token, token)
 
     def find_token(self, token: Token) -> None | Token:
@@ -48,17 +60,17 @@ class Finder:
 
     def find_childs_by_id(self, token_id: str) -> t.List[Token]:
         def _compare(token_tree: Token, param: str) -> bool:
-            return token_tree.id.lower().startswith(param.lower())
+            return token_tree.id.lower().startswith(param)
 
-        return self._find_childs(self.token, token_id, _compare)
+        return self._find_childs(self.token, token_id.lower(), _compare)
 
     @staticmethod
-    def recurse_merge_token(token_dst: Token, token_src: Token) -> bool:
+    def recurse_merge_token(token_dst: Token, token_src: Token | StoreToken) -> bool:
         ret = False
         if not Finder(token_dst).is_attr_same(token_src):
             return ret
 
-        if not token_src.childs:
+        if not token_src.has_childs:
             return ret
 
         ret = True
@@ -68,21 +80,26 @@ class Finder:
             else:
                 dst_val = token_dst.childs[token_id]
 
-                if not isinstance(dst_val, Token) and isinstance(src_val, Token):
+                if not isinstance(dst_val, _TOKEN_TYPES) and isinstance(
+                    src_val, _TOKEN_TYPES
+                ):
                     token_dst.childs[token_id] = src_val
                 elif (
-                    isinstance(dst_val, Token)
-                    and not dst_val.childs
-                    and isinstance(src_val, Token)
-                    and src_val.childs
+                    isinstance(dst_val, _TOKEN_TYPES)
+                    and not dst_val.has_childs
+                    and isinstance(src_val, _TOKEN_TYPES)
+                    and src_val.has_childs
                 ):
                     token_dst.childs[token_id] = src_val
                 elif (
-                    isinstance(dst_val, Token)
-                    and dst_val.childs
-                    and isinstance(src_val, Token)
-                    and src_val.childs
+                    isinstance(dst_val, _TOKEN_TYPES)
+                    and dst_val.has_childs
+                    and isinstance(src_val, _TOKEN_TYPES)
+                    and src_val.has_childs
                 ):
+                    # A view is read only, it is merged into a copy
+                    if isinstance(dst_val, StoreToken):
+                        dst_val = token_dst.childs[token_id] = dst_val.to_token()
                     if Finder.recurse_merge_token(dst_val, src_val):
                         ret = True
                 else:
@@ -92,17 +109,35 @@ class Finder:
 
 
 class Query:
-    def __init__(self, tokens: t.List[Token]) -> None:
+    def __init__(self, tokens: t.List[Token], index: None | PathIndex = None) -> None:
         self.tokens: t.List[Token] = tokens
 
-    def dump_str(self) -> str:
-        ret = ""
+        # Query childs from the index of the same tokens when given
+        self.index = index
+
+    def _find_childs(self, token: None | Token, id_prefix: str) -> t.List[Token]:
+        # Childs of token, or roots when token is None, matching a lowercased
+        # id_prefix
+        tokens = self.tokens if token is None else token.iter_childs()
+        if not id_prefix:
+            return list(tokens)
+
+        if self.index is not None:
+            return self.index.find_lowered(token, id_prefix)
+
+        return [c for c in tokens if c.id.lower().startswith(id_prefix)]
+
+    def iter_str(self) -> t.Iterator[str]:
         for idx, root_token in enumerate(self.tokens):
-            ret += f"[root: {idx}]\n"
-            ret += Transformer(root_token).to_structured_text()
-            ret += "\n"
+            yield f"[root: {idx}]\n"
+            yield from Transformer(root_token).iter_structured_text()
+            yield "\n"
 
-        return ret
+    def dump_str(self) -> str:
+        return "".join(self.iter_str())
+
+    def dump(self, fp: t.TextIO) -> None:
+        fp.writelines(self.iter_str())
 
     def to_dict(self) -> dict:
         lst = []
@@ -118,53 +153,326 @@ class Query:
         return ret
 
     def query(self, datapath: DataPath) -> list:
-        tokens_to_search = self.tokens
-        tokens_to_store: t.List[Token] = []
-        paths = datapath.paths
-
-        # Find roots
-        roots = []
-        path = paths.pop(0)
-        for token in self.tokens:
-            if token.id.lower().startswith(path.lower()):
-                roots.append(token)
-
-        # Query path on each token childs
-        for p in paths:
-            tokens_to_store = []
-
-            for token in tokens_to_search:
-                founds = Finder(token).find_childs_by_id(p)
-                if founds:
-                    tokens_to_store += founds
-
-            # Setup searched tokens for next path
-            tokens_to_search = tokens_to_store
-
-        if not paths:
-            ret = roots
+        return CompiledQuery(datapath).execute(self)
+
+    def _find_childs_many(
+        self, tokens: None | t.List[Token], segments: t.Iterable[str]
+    ) -> t.Dict[str, t.List[Token]]:
+        # Childs of tokens, or roots when tokens is None, found for each of
+        # the lowercased segments
+        founds: t.Dict[str, t.List[Token]] = {segment: [] for segment in segments}
+
+        if self.index is not None and (
+            tokens is None or len(tokens) <= INDEXED_FANOUT_SZ
+        ):
+            for segment in founds:
+                if tokens is None:
+                    founds[segment] = self.index.find_lowered(None, segment)
+                else:
+                    founds[segment] = [
+                        found
+                        for token in tokens
+                        for found in self.index.find_lowered(token, segment)
+                    ]
+            return founds
+
+        # Without index each child is read once, its id prefix of the length
+        # of the segments is looked up
+        by_length: t.Dict[int, t.Dict[str, t.List[Token]]] = {}
+        for segment, lst in founds.items():
+            by_length.setdefault(len(segment), {})[segment] = lst
+
+        if tokens is None:
+            childs: t.Iterable[Token] = self.tokens
         else:
-            ret = tokens_to_store
+            childs = (c for token in tokens for c in token.iter_childs())
+
+        for child in childs:
+            child_id = child.id.lower()
+            for length, lists in by_length.items():
+                segment_founds = lists.get(child_id[:length])
+                if segment_founds is not None:
+                    segment_founds.append(child)
+
+        return founds
+
+    def query_many(self, queries: t.Sequence[CompiledQuery]) -> t.List[t.List[Token]]:
+        # Parts of the queries are merged in a prefix tree, the childs of a
+        # searched token are read once for all the parts following the same
+        # prefix. The found tokens of each query are in the order of queries
+        results: t.List[t.List[Token]] = [[] for _ in queries]
+
+        # Node of the prefix tree is (childs by part, indexes of the queries).
+        # Queries with wildcards or regexes are executed alone
+        root: t.Tuple[dict, list] = ({}, [])
+        for idx, compiled in enumerate(queries):
+            if not compiled.is_plain:
+                results[idx] = compiled.execute(self)
+                continue
+
+            node = root
+            for step in compiled.steps:
+                node = node[0].setdefault(step.prefix, ({}, []))
+            node[1].append(idx)
+
+        # First parts search the roots, None
+        stack: list = [(root[0], None)]
+        while stack:
+            childs, tokens_to_search = stack.pop()
+            founds = self._find_childs_many(tokens_to_search, childs)
+
+            for segment, (next_childs, idxs) in childs.items():
+                for idx in idxs:
+                    results[idx] = list(founds[segment])
+
+                # Next parts are searched on the childs of the found tokens
+                if next_childs:
+                    stack.append((next_childs, founds[segment]))
+
+        return results
+
+    def get_paths(
+        self,
+        max_depth: None | int = None,
+        prefix: None | t.Sequence[str] = None,
+    ) -> t.Iterator[DataPath]:
+        # Paths are yielded depth first while the tree is walked, the ids of
+        # the current branch are the only state kept. Subtrees not matching
+        # the prefix parts, like in query(), are skipped
+        if max_depth is not None and max_depth < 1:
+            return
+
+        prefix_parts = [p.lower() for p in prefix] if prefix else []
+        symbol = Symbol()
+
+        path: t.List[str] = []
+        stack = [iter(self.tokens)]
+        while stack:
+            token = next(stack[-1], None)
+            if token is None:
+                stack.pop()
+                if path:
+                    path.pop()
+                continue
+
+            depth = len(path)
+            token_id = token.id
+            if depth < len(prefix_parts) and not token_id.lower().startswith(
+                prefix_parts[depth]
+            ):
+                continue
+
+            path.append(token_id)
+            if depth >= len(prefix_parts) - 1:
+                yield DataPath(path.copy(), symbol)
+
+            if token.has_childs and (max_depth is None or depth + 1 < max_depth):
+                stack.append(token.iter_childs())
+            else:
+                path.pop()
+
+
+# Parts matching any token of one level, any tokens of any levels, and the
+# quote of a regex searched in the ids ignoring case
+ANY_PART = "*"
+ANY_DEPTH_PART = "**"
+REGEX_QUOTE = "~"
+
+_REGEX_SPECIALS = frozenset(".^$*+?{}[]()|\\")
+
+# Predicate "[key=value]" at the end of a part
+_PREDICATE_RE = re.compile(r"\[([^\[\]=]+)=([^\[\]]*)\]$")
+
+
+class _Step(t.NamedTuple):
+    # Tokens at any depth are searched when is_deep, otherwise the childs.
+    # Ids start with prefix, lowercased, have a match of pattern and every
+    # (key, value) of predicates, lowercased
+    is_deep: bool
+    prefix: str
+    pattern: None | re.Pattern
+    predicates: t.Tuple[t.Tuple[str, str], ...] = ()
+
+
+def _split_predicates(part: str) -> t.Tuple[str, t.Tuple[t.Tuple[str, str], ...]]:
+    predicates: t.List[t.Tuple[str, str]] = []
+    match = _PREDICATE_RE.search(part)
+    while match:
+        key, value = match.groups()
+        predicates.insert(0, (key.strip().lower(), value.strip().lower()))
+        part = part[: match.start()]
+        match = _PREDICATE_RE.search(part)
+
+    return part, tuple(predicates)
+
+
+def _is_predicate_match(token: Token, key: str, value: str) -> bool:
+    # Key and value follow each other in the params, "vpls 10 customer 10",
+    # or are the name and value of a child, "shutdown no"
+    if token.has_params:
+        params = [p.lower() for p in token.params]
+        for idx in range(len(params) - 1):
+            if params[idx] == key and params[idx + 1] == value:
+                return True
+
+    for child in token.iter_childs():
+        if child.name.lower() == key and (child.value or "").lower() == value:
+            return True
+
+    return False
+
+
+def _is_regex(part: str) -> bool:
+    return len(part) > 1 and part.startswith(REGEX_QUOTE) and part.endswith(REGEX_QUOTE)
+
+
+def _get_regex_prefix(regex: str) -> str:
+    # Literal start of an anchored regex, the index finds the ids with it
+    if not regex.startswith("^") or "|" in regex:
+        return ""
+
+    prefix = ""
+    for idx, c in enumerate(regex[1:], 1):
+        if c in _REGEX_SPECIALS or regex[idx + 1 : idx + 2] in ("?", "*", "+", "{"):
+            break
+        prefix += c
+    return prefix.lower()
+
+
+def _compile_steps(paths: t.Sequence[str]) -> t.Tuple[_Step, ...]:
+    steps = []
+    is_deep = False
+    for path in paths:
+        if path == ANY_DEPTH_PART:
+            is_deep = True
+            continue
+
+        part, predicates = _split_predicates(path)
+        if part == ANY_PART:
+            steps.append(_Step(is_deep, "", None, predicates))
+        elif _is_regex(part):
+            regex = part[1:-1]
+            try:
+                pattern = re.compile(regex, re.IGNORECASE)
+            except re.error as e:
+                raise ValueError(f"Invalid regex in path part '{part}': {e}") from e
+            prefix = _get_regex_prefix(regex)
+            steps.append(_Step(is_deep, prefix, pattern, predicates))
+        else:
+            steps.append(_Step(is_deep, part.lower(), None, predicates))
+        is_deep = False
 
-        return ret
+    # Path ending with "**" gets every token under the previous part
+    if is_deep:
+        steps.append(_Step(True, "", None))
 
-    def get_paths(self) -> t.List[DataPath]:
+    return tuple(steps)
 
-        def traverse_data(token: Token, datapath: DataPath) -> t.List[DataPath]:
-            datapath.add(token.id)
-            paths = [copy.deepcopy(datapath)]
 
-            if token.childs:
-                for c in token.childs.values():
-                    ret = traverse_data(c, copy.deepcopy(datapath))
-                    paths.extend(ret)
+class CompiledQuery:
+    # Steps of the parts of a datapath, built once and executed on the Query
+    # of any tree. Prefix parts are lowercased and regexes compiled here
+    __slots__ = ("paths", "segments", "steps", "is_plain")
+
+    def __init__(self, datapath: DataPath) -> None:
+        self.paths: t.Tuple[str, ...] = tuple(datapath.paths)
+        self.segments: t.Tuple[str, ...] = tuple(
+            p if _is_regex(p) else p.lower() for p in self.paths
+        )
+        self.steps = _compile_steps(self.paths)
+
+        # Only prefixes of one level, Query.query_many() merges them
+        self.is_plain = all(
+            not s.is_deep and not s.pattern and not s.predicates for s in self.steps
+        )
 
-            return paths
+    def __str__(self) -> str:
+        return f"CompiledQuery, paths: {list(self.paths)}"
 
-        # Create list of list data_path
-        paths = []
-        for token in self.tokens:
-            datapath = DataPath()
-            paths.extend(traverse_data(token, datapath))
+    @staticmethod
+    def _is_match(token: Token, step: _Step) -> bool:
+        if not token.id.lower().startswith(step.prefix):
+            return False
+        if step.pattern is not None and step.pattern.search(token.id) is None:
+            return False
+        return all(_is_predicate_match(token, k, v) for k, v in step.predicates)
 
-        return paths
+    @staticmethod
+    def _find_childs(query: Query, token: None | Token, step: _Step) -> t.List[Token]:
+        # Tokens failing the predicates are dropped here, the next parts do
+        # not search under them
+        founds = query._find_childs(token, step.prefix)
+        if step.pattern is not None:
+            founds = [f for f in founds if step.pattern.search(f.id)]
+        for key, value in step.predicates:
+            founds = [f for f in founds if _is_predicate_match(f, key, value)]
+        return founds
+
+    def _find_deep(
+        self,
+        query: Query,
+        tokens: None | t.List[Token],
+        step: _Step,
+        may_nest: bool = False,
+    ) -> t.List[Token]:
+        # Tokens under tokens, or the whole tree when tokens is None, found
+        # in one walk. When tokens may be under each other, a token under
+        # two of them is visited once
+        founds = []
+        visited: None | t.Set[Token] = set() if may_nest else None
+
+        starts = [None] if tokens is None else tokens
+        for start in starts:
+            childs = query.tokens if start is None else list(start.iter_childs())
+            stack = list(reversed(childs))
+            while stack:
+                token = stack.pop()
+                if visited is not None:
+                    if token in visited:
+                        continue
+                    visited.add(token)
+
+                if self._is_match(token, step):
+                    founds.append(token)
+                if token.has_childs:
+                    stack.extend(reversed(list(token.iter_childs())))
+
+        return founds
+
+    def execute(self, query: Query) -> t.List[Token]:
+        if not self.steps:
+            return []
+
+        # Tokens found by a search at any depth may be under each other
+        first = self.steps[0]
+        may_nest = first.is_deep
+        if first.is_deep:
+            founds = self._find_deep(query, None, first)
+        else:
+            founds = self._find_childs(query, None, first)
+        tokens_to_search = founds
+
+        for step in self.steps[1:]:
+            if step.is_deep:
+                founds = self._find_deep(query, tokens_to_search, step, may_nest)
+                tokens_to_search = founds
+                may_nest = True
+                continue
+
+            step_query = query
+            if len(tokens_to_search) > INDEXED_FANOUT_SZ:
+                step_query = Query(query.tokens)
+            founds = [
+                found
+                for token in tokens_to_search
+                for found in self._find_childs(step_query, token, step)
+            ]
+            tokens_to_search = founds
+
+        return founds
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_path(text: str) -> CompiledQuery:
+    # Plans of the path texts used last, see compile_path.cache_info()
+    return CompiledQuery(DataPathParser(text).parse())
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import bisect
+import typing as t
+
+from cfgparser.tree.token import Token
+
+_Entry = t.Tuple[t.List[str], t.List[int], t.List[Token]]
+
+
+class PathIndex:
+    # Childs of each searched node sorted by their lowercased id, a prefix is
+    # found with a binary search and the matches are next to each other.
+    # Nodes are indexed on their first search and the index must be dropped
+    # when the tree changes
+    def __init__(self, tokens: t.List[Token]) -> None:
+        self.tokens = tokens
+        self._roots: None | _Entry = None
+        self._entries: t.Dict[Token, _Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _create_entry(tokens: t.List[Token]) -> _Entry:
+        ids = [token.id.lower() for token in tokens]
+        positions = sorted(range(len(ids)), key=ids.__getitem__)
+        return [ids[pos] for pos in positions], positions, tokens
+
+    def _get_entry(self, token: None | Token) -> _Entry:
+        if token is None:
+            if self._roots is None:
+                self._roots = self._create_entry(self.tokens)
+            return self._roots
+
+        entry = self._entries.get(token)
+        if entry is None:
+            entry = self._create_entry(list(token.iter_childs()))
+            self._entries[token] = entry
+        return entry
+
+    def find(self, token: None | Token, id_prefix: str) -> t.List[Token]:
+        # Childs of token, or roots when token is None, with an id starting
+        # with id_prefix ignoring case, in the order of the tree
+        return self.find_lowered(token, id_prefix.lower())
+
+    def find_lowered(self, token: None | Token, id_prefix: str) -> t.List[Token]:
+        # Same as find() with an id_prefix already lowercased
+        keys, positions, tokens = self._get_entry(token)
+
+        founds = []
+        idx = bisect.bisect_left(keys, id_prefix)
+        while idx < len(keys) and keys[idx].startswith(id_prefix):
+            founds.append(positions[idx])
+            idx += 1
+
+        return [tokens[pos] for pos in sorted(founds)]
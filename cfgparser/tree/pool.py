@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import sys
+import typing as t
+
+
+class StringPool:
+    # Words of the parsed lines are replaced by the first equal string seen,
+    # parsers sharing a pool share the strings of their tokens. Counters are
+    # only stats and are not locked for parsers running in threads
+    def __init__(self) -> None:
+        self._strings: t.Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def intern(self, text: str) -> str:
+        pooled = self._strings.get(text)
+        if pooled is None:
+            self.misses += 1
+            return self._strings.setdefault(text, text)
+
+        self.hits += 1
+        return pooled
+
+    def intern_words(self, words: t.List[str]) -> t.List[str]:
+        return [self.intern(word) for word in words]
+
+    def clear(self) -> None:
+        self._strings.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._strings),
+            "bytes": sum(sys.getsizeof(s) for s in self._strings),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import struct
+import sys
+import typing as t
+from array import array
+
+from cfgparser.tree.token import Token
+
+# Index of a missing node or string in the columns
+NONE_IDX = -1
+
+_CONTAINER_FLAG = 1
+
+# Binary format of a store: magic, version and byte order, then each column,
+# the lengths of the strings and the strings joined by "\0" in utf-8 as
+# (typecode, length, bytes)
+_MAGIC = b"CFGS"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sIB")
+_COLUMN_HEADER = struct.Struct("<cQ")
+_BYTE_ORDERS = {"little": 0, "big": 1}
+_COLUMNS = (
+    "parents",
+    "first_childs",
+    "next_siblings",
+    "keys",
+    "names",
+    "values",
+    "indents",
+    "flags",
+    "params_offsets",
+    "params",
+    "roots",
+)
+
+
+class TokenStore:
+    # Nodes are rows of parallel arrays, about 37 bytes per node, and the
+    # strings are stored once in the table of the store
+    def __init__(self) -> None:
+        self.strings: t.List[str] = []
+
+        # Ids of the strings, built again on first use after from_bytes()
+        self._string_ids: None | t.Dict[str, int] = {}
+
+        self.parents = array("i")
+        self.first_childs = array("i")
+        self.next_siblings = array("i")
+        self.keys = array("i")
+        self.names = array("i")
+        self.values = array("i")
+        self.indents = array("i")
+        self.flags = array("b")
+
+        # Params of node idx are params[params_offsets[idx]:params_offsets[idx + 1]]
+        self.params_offsets = array("i", [0])
+        self.params = array("i")
+
+        self.roots = array("i")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def to_bytes(self) -> bytes:
+        text = "\0".join(self.strings).encode("utf-8", "surrogatepass")
+        columns = [getattr(self, name) for name in _COLUMNS]
+        columns += [array("i", map(len, self.strings)), array("b", text)]
+
+        parts = [_HEADER.pack(_MAGIC, FORMAT_VERSION, _BYTE_ORDERS[sys.byteorder])]
+        for column in columns:
+            parts.append(_COLUMN_HEADER.pack(column.typecode.encode(), len(column)))
+            parts.append(column.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> TokenStore:
+        # ValueError when data is not a store of this format
+        try:
+            magic, version, byte_order = _HEADER.unpack_from(data)
+        except struct.error as e:
+            raise ValueError(f"Invalid token store: {e}") from e
+        if (magic, version, byte_order) != (
+            _MAGIC,
+            FORMAT_VERSION,
+            _BYTE_ORDERS[sys.byteorder],
+        ):
+            raise ValueError("Invalid token store: unknown format")
+
+        view = memoryview(data)
+        offset = _HEADER.size
+        columns = []
+        for _ in range(len(_COLUMNS) + 2):
+            try:
+                typecode, length = _COLUMN_HEADER.unpack_from(data, offset)
+            except struct.error as e:
+                raise ValueError(f"Invalid token store: {e}") from e
+            offset += _COLUMN_HEADER.size
+
+            column = array(typecode.decode())
+            end = offset + length * column.itemsize
+            if end > len(data):
+                raise ValueError("Invalid token store: truncated")
+            column.frombytes(view[offset:end])
+            columns.append(column)
+            offset = end
+
+        store = cls()
+        for name, column in zip(_COLUMNS, columns):
+            setattr(store, name, column)
+
+        # Strings are split at "\0" unless one of them has it
+        lengths = columns[-2]
+        text = columns[-1].tobytes().decode("utf-8", "surrogatepass")
+        store.strings = text.split("\0")
+        if len(store.strings) != len(lengths):
+            store.strings = []
+            offset = 0
+            for length in lengths:
+                store.strings.append(text[offset : offset + length])
+                offset += length + 1
+        store._string_ids = None
+
+        return store
+
+    def get_string_id(self, text: None | str) -> int:
+        if text is None:
+            return NONE_IDX
+
+        if self._string_ids is None:
+            self._string_ids = dict(zip(self.strings, range(len(self.strings))))
+
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(text)
+            self._string_ids[text] = string_id
+
+        return string_id
+
+    def get_string(self, string_id: int) -> None | str:
+        if string_id == NONE_IDX:
+            return None
+        return self.strings[string_id]
+
+    def _add_node(self, token: Token, parent: int, key: str) -> int:
+        idx = len(self.names)
+
+        self.parents.append(parent)
+        self.first_childs.append(NONE_IDX)
+        self.next_siblings.append(NONE_IDX)
+        self.keys.append(self.get_string_id(key))
+        self.names.append(self.get_string_id(token.name))
+        self.values.append(self.get_string_id(token.value))
+        self.indents.append(token.indent)
+        self.flags.append(_CONTAINER_FLAG if token.is_container else 0)
+
+        if token.has_params:
+            self.params.extend(self.get_string_id(p) for p in token.params)
+        self.params_offsets.append(len(self.params))
+
+        return idx
+
+    def extend(self, tokens: t.Iterable[Token]) -> None:
+        # Last child of each parent to link the next sibling in order
+        last_childs: t.Dict[int, int] = {}
+
+        stack = [(token, NONE_IDX, token.id) for token in reversed(list(tokens))]
+        while stack:
+            token, parent, key = stack.pop()
+            idx = self._add_node(token, parent, key)
+
+            if parent == NONE_IDX:
+                self.roots.append(idx)
+            elif parent in last_childs:
+                self.next_siblings[last_childs[parent]] = idx
+            else:
+                self.first_childs[parent] = idx
+            last_childs[parent] = idx
+
+            if token.has_childs:
+                stack.extend(
+                    (c, idx, c_key) for c_key, c in reversed(token.childs.items())
+                )
+
+    def to_tokens(self) -> t.List[Token]:
+        # Mutable root tokens of the nodes, childs keep their keys and order.
+        # Parents are stored before their childs
+        strings = self.strings
+        offsets = self.params_offsets
+        nodes: t.List[Token] = []
+        for idx, (parent, key, name, value, indent, flags) in enumerate(
+            zip(
+                self.parents,
+                self.keys,
+                self.names,
+                self.values,
+                self.indents,
+                self.flags,
+            )
+        ):
+            start = offsets[idx]
+            end = offsets[idx + 1]
+            token = Token(
+                strings[name],
+                None if value == NONE_IDX else strings[value],
+                indent,
+                [strings[p] for p in self.params[start:end]] if start != end else None,
+            )
+            if flags & _CONTAINER_FLAG:
+                token.is_container = True
+            nodes.append(token)
+
+            if parent != NONE_IDX:
+                nodes[parent].childs[strings[key]] = token
+
+        return [nodes[idx] for idx in self.roots]
+
+
+class StoreToken:
+    # Read only view of a store node with the attributes of Token
+    __slots__ = ("_store", "_idx")
+
+    def __init__(self, store: TokenStore, idx: int) -> None:
+        self._store = store
+        self._idx = idx
+
+    # Views of the same node are equal, as they are created on each access
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, StoreToken):
+            return NotImplemented
+        return self._store is other._store and self._idx == other._idx
+
+    def __hash__(self) -> int:
+        return hash((id(self._store), self._idx))
+
+    @property
+    def name(self) -> str:
+        return self._store.strings[self._store.names[self._idx]]
+
+    @property
+    def value(self) -> None | str:
+        return self._store.get_string(self._store.values[self._idx])
+
+    @property
+    def indent(self) -> int:
+        return self._store.indents[self._idx]
+
+    @property
+    def is_container(self) -> bool:
+        return bool(self._store.flags[self._idx] & _CONTAINER_FLAG)
+
+    @property
+    def params(self) -> list:
+        store = self._store
+        start = store.params_offsets[self._idx]
+        end = store.params_offsets[self._idx + 1]
+        return [store.strings[p] for p in store.params[start:end]]
+
+    @property
+    def has_params(self) -> bool:
+        offsets = self._store.params_offsets
+        return offsets[self._idx] != offsets[self._idx + 1]
+
+    @property
+    def childs(self) -> dict:
+        store = self._store
+        return {store.strings[store.keys[c._idx]]: c for c in self.iter_childs()}
+
+    @property
+    def has_childs(self) -> bool:
+        return self._store.first_childs[self._idx] != NONE_IDX
+
+    def iter_childs(self) -> t.Iterator[StoreToken]:
+        store = self._store
+        idx = store.first_childs[self._idx]
+        while idx != NONE_IDX:
+            yield StoreToken(store, idx)
+            idx = store.next_siblings[idx]
+
+    @property
+    def id(self) -> str:
+        store = self._store
+        name = store.strings[store.names[self._idx]]
+        value_id = store.values[self._idx]
+        if value_id == NONE_IDX:
+            return name
+        return f"{name} {store.strings[value_id]}"
+
+    def to_token(self) -> Token:
+        # Mutable copy of the node, its childs are still views
+        token = Token(
+            self.name, self.value, self.indent, self.params or None, self.childs or None
+        )
+        token.is_container = self.is_container
+        return token
+
+
+class StoreTree:
+    # Read only tree with the tokens of a parser tree moved to a store
+    def __init__(self, store: None | TokenStore = None) -> None:
+        self.store = store if store is not None else TokenStore()
+
+    @classmethod
+    def from_tokens(cls, tokens: t.Iterable[Token]) -> StoreTree:
+        tree = cls()
+        tree.store.extend(tokens)
+        return tree
+
+    @property
+    def tokens(self) -> t.List[StoreToken]:
+        return [StoreToken(self.store, idx) for idx in self.store.roots]
@@ -3,10 +3,21 @@ from __future__ import annotations
 import typing as t
 from abc import ABC
 from abc import abstractmethod
+from types import MappingProxyType
 
+# Leaves share these read only empties, a token allocates its own list or
+# dict the first time its params or childs are taken for writing
+_EMPTY_PARAMS: t.Tuple = ()
+_EMPTY_CHILDS: t.Mapping = MappingProxyType({})
 
 
 class Token:
+    # A leaf token is a single 80 bytes object on 64 bits CPython 3.12 (6
+    # slots with the GC header), a token with a __dict__ and its own empty
+    # list and dict took 256 bytes of allocator blocks. Childs still cost
+    # their entry in the parent dict
+    __slots__ = ("_name", "_value", "_id", "_indent", "_params", "_childs")
+
     def __init__(
         self,
         name: str,
@@ -15,31 +26,159 @@ class Token:
         params: t.Optional[t.List] = None,
         childs: t.Optional[t.Dict] = None,
     ) -> None:
-        self.name: str = name
-        self.value: t.Optional[str] = value
-        self.indent: int = indent
-        self.params: list = []
-        self.childs: dict = {}
-        self.is_container: bool = False
+        self._name: str = name
+        self._value: t.Optional[str] = value
+        self._id: t.Optional[str] = None
+        # Indent and the container flag in the lowest bit
+        self._indent: int = indent << 1
+        self._params: t.Sequence = params if params else _EMPTY_PARAMS
+        self._childs: t.Mapping = childs if childs else _EMPTY_CHILDS
+
+    def __getstate__(self) -> tuple:
+        return (
+            self._name,
+            self._value,
+            self.indent,
+            self._params or None,
+            self._childs or None,
+            self.is_container,
+        )
+
+    def __setstate__(self, state: tuple) -> None:
+        name, value, indent, params, childs, is_container = state
+        self._name = name
+        self._value = value
+        self._id = None
+        self._indent = indent << 1 | int(is_container)
+        self._params = params if params else _EMPTY_PARAMS
+        self._childs = childs if childs else _EMPTY_CHILDS
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, name: str) -> None:
+        self._name = name
+        self._id = None
+
+    @property
+    def value(self) -> t.Optional[str]:
+        return self._value
+
+    @value.setter
+    def value(self, value: t.Optional[str]) -> None:
+        self._value = value
+        self._id = None
+
+    @property
+    def indent(self) -> int:
+        return self._indent >> 1
+
+    @indent.setter
+    def indent(self, indent: int) -> None:
+        self._indent = indent << 1 | self._indent & 1
+
+    @property
+    def is_container(self) -> bool:
+        return bool(self._indent & 1)
+
+    @is_container.setter
+    def is_container(self, is_container: bool) -> None:
+        self._indent = self._indent & ~1 | int(is_container)
+
+    @property
+    def params(self) -> list:
+        if self._params is _EMPTY_PARAMS:
+            self._params = []
+        return self._params  # type: ignore[return-value]
+
+    @params.setter
+    def params(self, params: list) -> None:
+        self._params = params
 
-        if params:
-            self.params = params
+    @property
+    def childs(self) -> dict:
+        if self._childs is _EMPTY_CHILDS:
+            self._childs = {}
+        return self._childs  # type: ignore[return-value]
+
+    @childs.setter
+    def childs(self, childs: dict) -> None:
+        self._childs = childs
 
-        if childs:
-            self.childs = childs
+    # Read only accessors, they never allocate params or childs of a leaf
+    @property
+    def has_params(self) -> bool:
+        return bool(self._params)
+
+    @property
+    def has_childs(self) -> bool:
+        return bool(self._childs)
+
+    def iter_childs(self) -> t.Iterator[Token]:
+        return iter(self._childs.values())
 
     @property
     def id(self) -> str:
-        if isinstance(self.value, str):
-            return f"{self.name} {self.value}"
-        return self.name
+        # Cached until name or value is changed
+        if self._id is None:
+            if isinstance(self._value, str):
+                self._id = f"{self._name} {self._value}"
+            else:
+                self._id = self._name
+        return self._id
 
 
 class AbstractTokenBuilder(ABC):
+    # Dispatch keys of the rule as (first word, number of words), the number
+    # of words is None when the rule accepts any length
+    keywords: t.ClassVar[t.Tuple[t.Tuple[str, None | int], ...]] = ()
+
     @staticmethod
     @abstractmethod
     def check_rule(words: t.List[str]) -> bool: ...
 
+    # Childs of the token are indented by indent_step_sz, only the Cisco
+    # builders use it
     @staticmethod
     @abstractmethod
-    def create(words: t.List[str], indent: int) -> Token: ...
+    def create(
+        words: t.List[str], indent: int, indent_step_sz: int = 1
+    ) -> Token: ...
+
+
+class TokenBuilderRegistry:
+    def __init__(self, builders: t.Iterable[AbstractTokenBuilder] = ()) -> None:
+        # Builders indexed by the first word of the lines they can match
+        self._index: t.Dict[str, list] = {}
+
+        for builder in builders:
+            self.register(builder)
+
+    def register(self, builder: AbstractTokenBuilder) -> None:
+        if not builder.keywords:
+            raise ValueError(f"{type(builder).__name__} has no dispatch keywords")
+
+        for keyword, n_words in builder.keywords:
+            self._index.setdefault(keyword, []).append((n_words, builder))
+
+    def is_keyword(self, word: str) -> bool:
+        return word in self._index
+
+    def has_keyword(self, words: t.Iterable[str]) -> bool:
+        return not self._index.keys().isdisjoint(words)
+
+    def find(self, words: t.List[str]) -> None | AbstractTokenBuilder:
+        if not words:
+            return None
+
+        # Builders are checked in the order they are registered
+        for n_words, builder in self._index.get(words[0], ()):
+            if n_words is not None and n_words != len(words):
+                continue
+
+            if builder.check_rule(words):
+                return builder
+
+        return None
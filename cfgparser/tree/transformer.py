@@ -1,49 +1,70 @@
 from __future__ import annotations
 
+import functools
+import typing as t
+from collections.abc import Mapping
+
 from cfgparser.tree.token import Token
 
 
+@functools.lru_cache(maxsize=None)
+def _get_indent(indent: int) -> str:
+    return " " * indent
+
+
+def _enclose_string(text: str) -> str:
+    if " " in text:
+        text = f'"{text}"'
+    return text
+
+
 class Transformer:
     def __init__(self, token: Token) -> None:
         self.token = token
 
-    def to_structured_text(self) -> str:
-        def enclose_string(text: str) -> str:
-            if " " in text:
-                text = f'"{text}"'
-            return text
+    def _get_line(self, token: Token) -> str:
+        line = _get_indent(token.indent) + _enclose_string(token.name)
+        if token.value:
+            line += " " + _enclose_string(token.value)
 
-        def traverse_text(token: Token):
-            indent = ""
-            for __ in range(0, token.indent):
-                indent += " "
+        if token.has_params:
+            line += " " + " ".join([_enclose_string(p) for p in token.params])
 
-            text = indent + enclose_string(token.name)
-            if token.value:
-                text += " " + enclose_string(token.value)
+        return line
 
-            if token.params:
-                text = f"{text} {" ".join([enclose_string(t) for t in token.params])}"
+    def iter_structured_text(self) -> t.Iterator[str]:
+        # One line per token in a single pass, lines are separated by "\n"
+        # without one after the last line
+        yield self._get_line(self.token)
 
-            for c in token.childs.values():
-                text += "\n"
-                text += traverse_text(c)
+        stack = [self.token.iter_childs()]
+        while stack:
+            token = next(stack[-1], None)
+            if token is None:
+                stack.pop()
+                continue
 
-            return text
+            yield "\n" + self._get_line(token)
+            if token.has_childs:
+                stack.append(token.iter_childs())
 
-        return traverse_text(self.token)
+    def to_structured_text(self) -> str:
+        return "".join(self.iter_structured_text())
+
+    def dump(self, fp: t.TextIO) -> None:
+        fp.writelines(self.iter_structured_text())
 
     def to_dict(self) -> dict:
         data: dict = {}
 
         def traverse_data(token: Token, data: dict):
-            if token.is_container or token.childs:
+            if token.is_container or token.has_childs:
                 data[token.id] = {}
-                for c in token.childs.values():
+                for c in token.iter_childs():
                     traverse_data(c, data[token.id])
             else:
-                if token.params:
-                    data[token.name] = [token.value] + token.params
+                if token.has_params:
+                    data[token.name] = [token.value, *token.params]
                 elif token.value:
                     data[token.name] = token.value
                 else:
@@ -51,3 +72,59 @@ class Transformer:
 
         traverse_data(self.token, data)
         return data
+
+    def to_view(self) -> TokenView:
+        return TokenView([self.token])
+
+
+def _get_key(token: Token) -> str:
+    if token.is_container or token.has_childs:
+        return token.id
+    return token.name
+
+
+class TokenView(Mapping):
+    # Read only mapping equal to the dict of Transformer.to_dict() merged for
+    # the tokens. Keys are read on first access and the views of the childs
+    # are created when their key is read, to_dict() gives the plain dict
+    __slots__ = ("_tokens", "_entries")
+
+    def __init__(self, tokens: t.Iterable[Token]) -> None:
+        self._tokens: None | t.Iterable[Token] = tokens
+        self._entries: None | t.Dict[str, Token] = None
+
+    def _get_entries(self) -> t.Dict[str, Token]:
+        # A later token with the same key replaces the previous one
+        if self._entries is None:
+            self._entries = {_get_key(token): token for token in self._tokens or []}
+            self._tokens = None
+        return self._entries
+
+    @staticmethod
+    def _get_value(token: Token) -> t.Any:
+        if token.is_container or token.has_childs:
+            return TokenView(token.iter_childs())
+        if token.has_params:
+            return [token.value, *token.params]
+        return token.value or ""
+
+    def __getitem__(self, key: str) -> t.Any:
+        return self._get_value(self._get_entries()[key])
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._get_entries()
+
+    def __iter__(self) -> t.Iterator[str]:
+        return iter(self._get_entries())
+
+    def __len__(self) -> int:
+        return len(self._get_entries())
+
+    def __repr__(self) -> str:
+        return f"TokenView({self.to_dict()!r})"
+
+    def to_dict(self) -> dict:
+        data: dict = {}
+        for token in self._get_entries().values():
+            data.update(Transformer(token).to_dict())
+        return data
@@ -1,13 +1,14 @@
 import argparse
 import json
+import sys
 import typing as t
 
 from loguru import logger
 
 from cfgparser.base import base
-from cfgparser.cisco.parser import CiscoParser
-from cfgparser.nokia.classic.parser import NokiaClassicParser
-from cfgparser.path.parser import DataPathParser
+from cfgparser.base import batch
+from cfgparser.base.cache import ParseCache
+from cfgparser.tree.finder import compile_path
 from cfgparser.ui import prompt
 
 
@@ -20,9 +21,58 @@ def _get_args():
     # Parse sub command
     cmd_parse = sub_parser.add_parser("parse", help="parse a config file")
     cmd_parse.add_argument("config_file", type=str, help="config file to parse")
-    cmd_parse.add_argument(
+    path_group = cmd_parse.add_mutually_exclusive_group()
+    path_group.add_argument(
         "--datapath", type=str, help="the path of data in mode", required=False
     )
+    path_group.add_argument(
+        "--datapath-file",
+        type=str,
+        help="file with one datapath per line, all queried in one walk",
+    )
+    cmd_parse.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="write one line of json for each match of the datapath",
+    )
+    cmd_parse.add_argument(
+        "--output", type=str, help="file to write the data, default to stdout"
+    )
+    cmd_parse.add_argument(
+        "--cache-dir", type=str, help="directory to keep the parsed trees"
+    )
+
+    # Fleet sub command
+    cmd_fleet = sub_parser.add_parser(
+        "fleet", help="query the config files of a directory or glob"
+    )
+    cmd_fleet.add_argument(
+        "target", type=str, help="directory or glob pattern of config files"
+    )
+    cmd_fleet.add_argument(
+        "--datapath",
+        type=str,
+        action="append",
+        default=[],
+        help="the path of data to query, can be repeated",
+    )
+    cmd_fleet.add_argument(
+        "--datapath-file", type=str, help="file with one datapath per line"
+    )
+    cmd_fleet.add_argument(
+        "--workers", type=int, help="number of worker processes, default to cpus"
+    )
+    cmd_fleet.add_argument(
+        "--chunk-size",
+        type=int,
+        help="number of files sent to a worker at once, written when all done",
+    )
+    cmd_fleet.add_argument(
+        "--output", type=str, help="file to write the data, default to stdout"
+    )
+    cmd_fleet.add_argument(
+        "--cache-dir", type=str, help="directory to keep the parsed trees"
+    )
 
     # Parse sub command
     sub_parser.add_parser("prompt", help="enter cfgparse prompt ui")
@@ -31,37 +81,132 @@ def _get_args():
     return args
 
 
-def _parse(f_path: str, path: str) -> None:
-    parsers: t.Dict[str, base.BaseParser] = {
-        "Nokia Classic": NokiaClassicParser(),
-        "Cisco": CiscoParser(),
-    }
+def _write_data(
+    parser: base.BaseParser, fp: t.TextIO, path: str, ndjson: bool
+) -> None:
+    datapath = compile_path(path) if path else None
+    parser.dump_json(fp, datapath, ndjson)
+
+    if not ndjson:
+        fp.write("\n")
 
-    parser = None
+
+def _read_paths(f_path: str) -> t.List[str]:
+    # Empty lines and comments starting with '#' are skipped
     with open(f_path, "r") as fd:
-        for name, p in parsers.items():
-            fd.seek(0)
-            if p.identify(fd):
-                logger.info(f"Check parser '{name}': compatible")
-                parser = p
-                break
+        lines = [line.strip() for line in fd]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def _check_paths(paths: t.Iterable[str]) -> bool:
+    # A datapath with an invalid ~regex~ part is a usage error, reported
+    # before any file is parsed like in the prompt
+    for path in paths:
+        try:
+            compile_path(path)
+        except ValueError as e:
+            logger.error(f"Invalid datapath: {e}")
+            return False
+    return True
+
+
+def _write_many(
+    parser: base.BaseParser, fp: t.TextIO, paths: t.List[str], ndjson: bool
+) -> None:
+    results = {
+        path: [match.to_dict() for match in matches]
+        for path, matches in parser.query_many(paths).items()
+    }
 
-            logger.info(f"Check parser '{name}': not compatible")
+    # One line for each match of each path with ndjson
+    if ndjson:
+        for path, matches in results.items():
+            for match in matches:
+                record = {"path": path, "match": match}
+                fp.write(json.dumps(record, sort_keys=True) + "\n")
+    else:
+        json.dump(results, fp, indent=4, sort_keys=True)
+        fp.write("\n")
+
+
+def _parse(
+    f_path: str,
+    path: str,
+    ndjson: bool = False,
+    output: str = "",
+    paths_file: str = "",
+    cache_dir: str = "",
+) -> None:
+    paths = _read_paths(paths_file) if paths_file else []
+    if not _check_paths([path, *paths] if path else paths):
+        return None
 
-    if not parser:
+    # Unchanged configs are loaded from the cache without parsing. The file
+    # is identified by the parsers of batch, like the files of a fleet
+    cache = ParseCache(cache_dir) if cache_dir else None
+    parser = batch.parse_file(f_path, cache=cache)
+    if parser is None:
         logger.info("Could not find correct parser")
         return None
 
-    with open(f_path, "r") as fd:
-        parser.parse(fd)
+    logger.info(f"Parser: {type(parser).__name__}")
 
-    if path:
-        datapath = DataPathParser(path).parse()
-        logger.info(
-            f"Data:\n{json.dumps(parser.query(datapath), indent=4, sort_keys=True)}"
-        )
+    def write(fp: t.TextIO) -> None:
+        if paths_file:
+            _write_many(parser, fp, paths, ndjson)
+        else:
+            _write_data(parser, fp, path, ndjson)
+
+    # Data is streamed from the tree to the output without a full copy
+    if output:
+        logger.info(f"Data: {output}")
+        with open(output, "w") as fp:
+            write(fp)
+    else:
+        logger.info("Data:")
+        write(sys.stdout)
+
+    return None
+
+
+def _fleet(
+    target: str,
+    paths: t.List[str],
+    paths_file: str = "",
+    workers: None | int = None,
+    chunk_sz: None | int = None,
+    output: str = "",
+    cache_dir: str = "",
+) -> None:
+    if paths_file:
+        paths = paths + _read_paths(paths_file)
+    if not paths:
+        logger.info("No datapath to query")
+        return None
+    if not _check_paths(paths):
+        return None
+
+    f_paths = batch.iter_files(target)
+    logger.info(f"Query {len(f_paths)} files")
+    cache = ParseCache(cache_dir) if cache_dir else None
+
+    # Records are written while the files are done, one json line each
+    def write(fp: t.TextIO) -> None:
+        n_errors = 0
+        records = batch.query_fleet(f_paths, paths, workers, chunk_sz, cache)
+        for record in records:
+            if "error" in record:
+                n_errors += 1
+                logger.warning(f"Cannot query '{record['file']}': {record['error']}")
+            fp.write(json.dumps(record, sort_keys=True) + "\n")
+
+        logger.info(f"Failed files: {n_errors}")
+
+    if output:
+        with open(output, "w") as fp:
+            write(fp)
     else:
-        logger.info(f"Data:\n{json.dumps(parser.to_dict(), indent=4, sort_keys=True)}")
+        write(sys.stdout)
 
     return None
 
@@ -70,7 +215,25 @@ def run():
     args = _get_args()
 
     if args.command == "parse":
-        _parse(args.config_file, args.datapath)
+        _parse(
+            args.config_file,
+            args.datapath,
+            args.ndjson,
+            args.output,
+            args.datapath_file,
+            args.cache_dir,
+        )
+
+    elif args.command == "fleet":
+        _fleet(
+            args.target,
+            args.datapath,
+            args.datapath_file,
+            args.workers,
+            args.chunk_size,
+            args.output,
+            args.cache_dir,
+        )
 
     elif args.command == "prompt":
         prompt.start()
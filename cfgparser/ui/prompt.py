@@ -14,9 +14,9 @@ from prompt_toolkit.completion import Completion
 from prompt_toolkit.document import Document
 
 from cfgparser.base import base
-from cfgparser.cisco.parser import CiscoParser
-from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.base import batch
 from cfgparser.path.parser import  DataPathParser
+from cfgparser.tree.finder import compile_path
 
 
 class CommandCompleter(Completer):
@@ -126,10 +126,12 @@ class CommandLine:
             "path": self._handle_cmd_path,
         }
 
-        # Need to refactor
+        # Parsers of batch. Paths are queried again and again in a session,
+        # their results are cached
+        cache_sz = base.BaseParser.RESULT_CACHE_SZ
         self._parsers: t.Dict[str, base.AbstractParser] = {
-            "Nokia Classic": NokiaClassicParser(),
-            "Cisco": CiscoParser(),
+            name: parser_cls(result_cache_sz=cache_sz)
+            for name, parser_cls in batch.PARSERS.items()
         }
         self._parser: base.AbstractParser = base.NULL_PARSER
         self._completer = completer
@@ -167,9 +169,13 @@ class CommandLine:
             self._completer.args["path"] = self._parser.to_dict()
 
     def _handle_cmd_path(self, args) -> None:
-        data_path = DataPathParser(args.datapath).parse()
+        try:
+            data_path = compile_path(args.datapath)
+        except ValueError as e:
+            prompt_print(str(e))
+            return
 
-        data = self._parser.query(data_path)
+        data = [match.to_dict() for match in self._parser.query(data_path)]
         prompt_print(json.dumps(data, indent=4))
 
     def parse_prompt_line(self, line: str) -> None:
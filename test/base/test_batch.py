@@ -0,0 +1,110 @@
+import os
+
+from cfgparser.base import batch
+from cfgparser.base.cache import ParseCache
+from cfgparser.ui import cmd
+
+CFG_TEXT = """
+!
+interface GigabitEthernet0/1
+ description uplink
+!
+interface Loopback0
+ description {}
+!
+"""
+
+
+def test_query_fleet(tmp_path):
+    f_paths = []
+    for idx in range(5):
+        f_path = tmp_path / f"r{idx}.cfg"
+        f_path.write_text(CFG_TEXT.format(f"r{idx}"))
+        f_paths.append(str(f_path))
+
+    bad_path = tmp_path / "bad.cfg"
+    bad_path.write_text("garbage\n")
+
+    f_paths = batch.iter_files(str(tmp_path))
+    assert f_paths == sorted(f_paths) and len(f_paths) == 6
+    assert batch.iter_files(str(tmp_path / "r*.cfg")) == f_paths[1:]
+
+    # A missing or unknown file is reported and the other files go on
+    paths = ["interface/Loop/desc", "interface/Giga/desc"]
+    records = list(
+        batch.query_fleet(f_paths + [str(tmp_path / "nope.cfg")], paths, 2, 2)
+    )
+
+    errors = {r["file"]: r["error"] for r in records if "error" in r}
+    assert errors[str(bad_path)] == "no compatible parser"
+    assert errors[str(tmp_path / "nope.cfg")].startswith("FileNotFoundError")
+
+    matches = [r for r in records if "match" in r]
+    assert len(matches) == 10
+    assert {
+        "file": str(tmp_path / "r3.cfg"),
+        "path": "interface/Loop/desc",
+        "match": {"description": "r3"},
+    } in matches
+    assert {"description": "uplink"} in [r["match"] for r in matches]
+
+
+def test_cli_parsers(tmp_path):
+    # The CLI identifies files with the parsers of batch, a second run loads
+    # the tree from the parse cache
+    f_path = str(tmp_path / "r1.cfg")
+    with open(f_path, "w") as fd:
+        fd.write(CFG_TEXT.format("r1"))
+    cache_dir = str(tmp_path / "cache")
+
+    outputs = []
+    for idx in range(2):
+        output = str(tmp_path / f"out{idx}.json")
+        cmd._parse(f_path, "interface/*/desc", True, output, "", cache_dir)
+        with open(output) as fd:
+            outputs.append(fd.read())
+    assert outputs[0] == outputs[1]
+    assert outputs[0].splitlines() == [
+        '{"description": "uplink"}',
+        '{"description": "r1"}',
+    ]
+    assert len(os.listdir(cache_dir)) == 1
+
+    # An invalid regex is reported before the file is parsed
+    output = str(tmp_path / "bad.json")
+    cmd._parse(f_path, "interface/~Loop[~/desc", True, output, "", cache_dir)
+    cmd._fleet(str(tmp_path / "*.cfg"), ["~Loop[~"], output=output)
+    assert not os.path.exists(output)
+
+    paths = ["interface/Loop/desc"]
+    records = list(batch.query_fleet([f_path], paths, 1))
+    cache = ParseCache(cache_dir)
+    assert list(batch.query_fleet([f_path], paths, 1, cache=cache)) == records
+
+
+def test_query_fleet_worker_died(tmp_path, monkeypatch):
+    f_paths = []
+    for idx in range(12):
+        f_path = str(tmp_path / f"r{idx:02}.cfg")
+        with open(f_path, "w") as fd:
+            fd.write(CFG_TEXT.format(f"r{idx}"))
+        f_paths.append(f_path)
+
+    # The workers are forked with the patched query_file, the process of the
+    # file r05 dies
+    query_file = batch.query_file
+
+    def query_or_die(f_path, paths, cache=None):
+        if f_path.endswith("r05.cfg"):
+            os._exit(1)
+        return query_file(f_path, paths, cache)
+
+    monkeypatch.setattr(batch, "query_file", query_or_die)
+
+    records = list(batch.query_fleet(f_paths, ["interface/Loop/desc"], 2, 2))
+    errors = [r for r in records if "error" in r]
+    assert [r["file"] for r in errors] == [f_paths[5]]
+    assert errors[0]["error"].startswith("BrokenProcessPool")
+
+    matches = sorted(r["match"]["description"] for r in records if "match" in r)
+    assert matches == sorted(f"r{idx}" for idx in range(12) if idx != 5)
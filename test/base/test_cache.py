@@ -0,0 +1,138 @@
+import os
+
+from cfgparser.base.cache import LruCache
+from cfgparser.base.cache import ParseCache
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.path.path import DataPath
+from cfgparser.tree.store import StoreTree
+from cfgparser.tree.token import Token
+
+CFG_TEXT = """
+# TiMOS-B-20.10.R1
+configure
+    port 1/1/1
+        no shutdown
+    exit
+    port 1/1/2
+        shutdown
+    exit
+exit all
+# Finished
+"""
+
+
+def test_lru_cache():
+    cache = LruCache(max_size=10, get_size=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    assert cache.get("a") == "xxxx"
+
+    # The least recently used entry is evicted to fit the new one
+    cache.put("c", "xxxx")
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.size == 8
+
+    # Too big to be kept
+    cache.put("d", "x" * 11)
+    assert "d" not in cache
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+    assert stats["entries"] == 2
+
+
+def test_parser_result_cache():
+    assert NokiaClassicParser().result_cache is None
+
+    parser = NokiaClassicParser(result_cache_sz=1024 * 1024)
+    parser.parse(CFG_TEXT.split("\n"))
+
+    datapath = DataPath(["configure", "port 1/1/2"])
+    result = parser.query(datapath)
+    assert result == [{"port 1/1/2": {"shutdown": "yes"}}]
+    assert datapath.paths == ["configure", "port 1/1/2"]
+
+    # Callers get their own copies of the cached results
+    result.append("x")
+    assert parser.query(datapath) == result[:1]
+    data = parser.to_dict()
+    data["x"] = 1
+    assert "x" not in parser.to_dict()
+    assert parser.dumps() is parser.dumps()
+    stats = parser.result_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (3, 3)
+
+    # A new parse drops the results of the old tree
+    parser.parse(CFG_TEXT.replace("1/1/2", "1/1/3").split("\n"))
+    assert len(parser.result_cache) == 0
+    assert {"port 1/1/3": {"shutdown": "yes"}} in parser.query(
+        DataPath(["configure", "port 1/1/3"])
+    )
+
+
+def test_parse_cache(tmp_path):
+    lines = CFG_TEXT.split("\n")
+    cache = ParseCache(str(tmp_path))
+
+    # A parsed tree is kept, its store is saved in the background
+    parser = NokiaClassicParser(cache=cache)
+    parser.parse(lines)
+    assert cache.stats()["misses"] == 1
+    assert not isinstance(parser._tree, StoreTree)
+    cache.wait()
+    files = os.listdir(tmp_path)
+    assert len(files) == 1
+
+    # Same lines are loaded from the cache by another parser
+    cached = NokiaClassicParser(cache=cache)
+    cached.parse(list(lines))
+    assert cache.stats()["hits"] == 1
+    assert isinstance(cached._tree, StoreTree)
+    assert cached.to_dict() == parser.to_dict()
+    assert cached.query(DataPath(["configure", "port 1/1/2"])) == [
+        {"port 1/1/2": {"shutdown": "yes"}}
+    ]
+
+    # Iterators skip the header, so they are cached apart from lists
+    NokiaClassicParser(cache=cache).parse(iter(lines))
+    cache.wait()
+    assert len(os.listdir(tmp_path)) == 2
+
+    # A corrupted file is a miss and is parsed again
+    with open(tmp_path / files[0], "wb") as fd:
+        fd.write(b"CFGS")
+    misses = cache.stats()["misses"]
+    reparsed = NokiaClassicParser(cache=cache)
+    reparsed.parse(lines)
+    assert cache.stats()["misses"] == misses + 1
+    assert reparsed.to_dict() == parser.to_dict()
+
+    # Parsing again merges the lines in the loaded tree, a hit and a miss
+    # give the same tree
+    for parser in (parser, cached):
+        parser.parse(CFG_TEXT.replace("1/1/2", "1/1/3").split("\n"))
+    assert cached.to_dict() == parser.to_dict()
+    assert {"port 1/1/3": {"shutdown": "yes"}} in cached.query(
+        DataPath(["configure", "port"])
+    )
+
+
+def test_parse_cache_evict(tmp_path):
+    # Least recently used files are evicted down to 3/4 of max_size, with
+    # the temporary files left by a crash
+    for mtime, name in enumerate(["a.tree", "b.tree", "c.tree", "old.tmp", "new.tmp"]):
+        with open(tmp_path / name, "wb") as fd:
+            fd.write(b"x" * 1000)
+        os.utime(tmp_path / name, (mtime, mtime))
+    os.utime(tmp_path / "new.tmp")
+
+    cache = ParseCache(str(tmp_path), max_size=2500)
+    assert sorted(os.listdir(tmp_path)) == ["c.tree", "new.tmp"]
+    assert cache.size == 1000
+
+    # Saves are counted without listing the directory until over max_size
+    store = StoreTree.from_tokens([Token("hostname", "r1", 0)]).store
+    cache.save("d", store)
+    assert cache.size == 1000 + os.path.getsize(tmp_path / "d.tree")
+    assert "c.tree" in os.listdir(tmp_path)
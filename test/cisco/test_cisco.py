@@ -1,3 +1,5 @@
+from cfgparser.base import batch
+from cfgparser.cisco import tokenizer
 from cfgparser.cisco.parser import CiscoParser
 
 
@@ -240,3 +242,145 @@ interface Port-channel3
     result = parser.to_dict()
 
     assert ref == result
+
+
+def test_parse_wide_fan_out():
+    lines = ["!"]
+    for idx in range(3000):
+        lines.append(f"ip prefix-list PL seq {idx} permit 10.0.{idx % 256}.0/24")
+    lines += ["interface Loopback0", " ip address 1.1.1.1 255.255.255.255", "end"]
+
+    parser = CiscoParser()
+    parser.parse(lines)
+    result = parser.to_dict()
+
+    seqs = result["ip"]["prefix-list"]["PL"]["seq"]
+    assert len(seqs) == 3000
+    assert seqs["2999"] == {"permit": "10.0.183.0/24"}
+    assert result["interface"] == {
+        "Loopback0": {
+            "ip": {"address": {"ipaddress": "1.1.1.1", "netmask": "255.255.255.255"}}
+        }
+    }
+
+
+def test_parse_token_builder_merge():
+    cfg_text = """
+!
+banner login ^CLogin^C
+line con 0
+ stopbits 1
+banner motd ^CMotd^C
+ntp source Loopback20
+banner exec ^CExec^C
+end
+"""
+
+    ref = {
+        "banner": {"login": "^CLogin^C", "motd": "^CMotd^C", "exec": "^CExec^C"},
+        "line": {"con": {"0": {"stopbits": "1"}}},
+        "ntp": {"source": "Loopback20"},
+    }
+
+    lines = cfg_text.split("\n")
+
+    parser = CiscoParser()
+    parser.parse(lines)
+
+    assert parser.to_dict() == ref
+    assert [token.name for token in parser._tree.tokens] == ["banner", "line", "ntp"]
+
+
+def test_parse_nested_parent_lines():
+    cfg_text = """
+router bgp 65001
+ neighbor 10.0.0.1 remote-as 65002
+ address-family ipv4 vrf CUST
+  neighbor 10.0.0.1 activate
+  no neighbor 10.0.0.2 activate
+  redistribute connected
+ exit-address-family
+interface Loopback0
+ description loop back
+  ip address 1.1.1.1 255.255.255.255
+ no shutdown
+"""
+
+    ref = {
+        "router": {
+            "bgp": {
+                "65001": {
+                    "neighbor": {"10.0.0.1": {"remote-as": "65002"}},
+                    "address-family": {
+                        "ipv4": {
+                            "vrf": {
+                                "CUST": {
+                                    "neighbor": {
+                                        "10.0.0.1": "activate",
+                                        "10.0.0.2": {"activate": "no"},
+                                    },
+                                    "redistribute": "connected",
+                                }
+                            }
+                        }
+                    },
+                    "exit-address-family": "",
+                }
+            }
+        },
+        "interface": {
+            "Loopback0": {
+                "description": "loop back ip address 1.1.1.1 255.255.255.255",
+                "shutdown": "no",
+            }
+        },
+    }
+
+    lines = [f"{line}\n" for line in cfg_text.split("\n")]
+
+    parser = CiscoParser()
+    parser.parse(lines)
+
+    assert parser.to_dict() == ref
+
+
+def test_parse_many_concurrent(tmp_path):
+    cfg_text = """
+!
+username admin privilege 15 secret 5 $1$abc
+interface GigabitEthernet{idx}
+{indent}description uplink {idx}
+{indent}ip address 10.0.0.{idx} 255.255.255.0
+{indent}service instance {idx} ethernet
+{indent}{indent}encapsulation dot1q {idx}
+{indent}{indent}banner motd ^C{idx}^C
+!
+end
+"""
+
+    f_paths = []
+    for idx in range(40):
+        f_path = tmp_path / f"router_{idx}.cfg"
+        f_path.write_text(cfg_text.format(idx=idx, indent=" " * (1 + idx % 2)))
+        f_paths.append(str(f_path))
+
+    refs = [batch.parse_file(f_path) for f_path in f_paths]
+    results = batch.parse_many(f_paths * 5, workers=8)
+
+    for idx, result in enumerate(results):
+        ref = refs[idx % len(refs)]
+        assert isinstance(result, CiscoParser)
+        assert result.dumps() == ref.dumps()
+        assert result.to_dict() == ref.to_dict()
+
+
+def test_is_ip_address():
+    assert tokenizer.is_ip_address("10.144.80.129")
+    assert tokenizer.is_ip_address("255.255.255.0")
+    assert tokenizer.is_ip_address("2001:db8::1")
+    assert tokenizer.is_ip_address("::ffff:10.0.0.1")
+    assert not tokenizer.is_ip_address("256.0.0.1")
+    assert not tokenizer.is_ip_address("10.0.0.01")
+    assert not tokenizer.is_ip_address("10.0.0")
+    assert not tokenizer.is_ip_address("dhcp")
+    assert not tokenizer.is_ip_address("2001:db8:::1")
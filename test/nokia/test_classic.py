@@ -1,6 +1,10 @@
+import io
+
 from cfgparser.nokia.classic.parser import NokiaClassicParser
 from cfgparser.nokia.classic.parser import NokiaTree
 from cfgparser.path.parser import DataPathParser
+from cfgparser.tree.token import Token
+from cfgparser.tree.transformer import Transformer
 
 
 def test_parser_pass():
@@ -251,6 +255,14 @@ def test_tokenize_line():
     result = NokiaTree._tokenize_line(line)
     assert result == ["user", "snmpv3_user"]
 
+    line = ' sap sap:10 "sap sap" sa\n'
+    result = NokiaTree._tokenize_line(line)
+    assert result == ["sap", "sap:10", "sap sap", "sa"]
+
+    line = " description " + '"' + "x " * 5000 + '"'
+    result = NokiaTree._tokenize_line(line)
+    assert result == ["description", "x " * 5000]
+
 
 def test_multiple_params():
     cfg_text = """
@@ -439,6 +451,20 @@ exit
     result = [p.paths for p in data_paths]
     assert result == ref
 
+    # Paths are filtered by depth and by prefix parts like a query
+    result = [p.paths for p in parser.get_paths(max_depth=2)]
+    assert result == [r for r in ref if len(r) <= 2]
+
+    result = [
+        p.paths
+        for p in parser.get_paths(max_depth=4, prefix=["conf", "router", "interface S"])
+    ]
+    assert result == [
+        ["configure", "router Base", "interface system"],
+        ["configure", "router Base", "interface system", "shutdown no"],
+        ["configure", "router Base", "interface system", "address 1.1.1.5/32"],
+    ]
+
 
 def test_query():
     cfg_text = """
@@ -485,3 +511,191 @@ exit
     ]
 
     assert ref == result
+
+
+def test_parser_wide_section():
+    lines = ["configure", "    service"]
+    for idx in range(2000):
+        lines += [
+            f"        sap 1/1/1:{idx} create",
+            "            no shutdown",
+            "        exit",
+        ]
+    lines += ["    exit", "exit all"]
+
+    parser = NokiaClassicParser()
+    parser.parse(lines)
+
+    result = parser.to_dict()
+    saps = result["configure"]["service"]
+    assert len(saps) == 2000
+    assert saps["sap 1/1/1:1999"] == {"shutdown": "no"}
+    assert list(saps)[0] == "sap 1/1/1:1999"
+
+
+def test_parser_merge_builder_child():
+    lines = [
+        "configure",
+        "    service",
+        '        vpls 1 name "v" customer 1 create',
+        '            customer 1 name "c x" create',
+        "                description d",
+        "            exit",
+        "        exit",
+        "    exit",
+        "exit all",
+    ]
+
+    parser = NokiaClassicParser()
+    parser.parse(lines)
+
+    # The line merges in the child the builder stored under "customer"
+    vpls = parser.to_dict()["configure"]["service"]["vpls 1"]
+    assert list(vpls) == ["name", "customer 1"]
+    assert vpls["customer 1"] == {"name": "c x", "description": "d"}
+
+
+def test_iter_sections():
+    cfg_text = """
+# TiMOS-B-20.10.R1
+configure
+    service
+        customer 1 name "1" create
+        exit
+        vpls 100 name "100" customer 1 create
+            sap 1/1/2:100 create
+                no shutdown
+            exit
+            no shutdown
+        exit
+    exit
+    router Base
+        interface "system"
+            address 1.1.1.5/32
+        exit
+    exit
+exit all
+# Finished
+"""
+    lines = cfg_text.split("\n")
+
+    parser = NokiaClassicParser()
+    result = [
+        (datapath.paths, Transformer(token).to_dict())
+        for datapath, token in parser.iter_sections(iter(lines), depth=2)
+    ]
+
+    ref = [
+        (["configure", "service", "customer 1"], {"customer 1": {"name": "1"}}),
+        (
+            ["configure", "service", "vpls 100"],
+            {
+                "vpls 100": {
+                    "name": "100",
+                    "customer": "1",
+                    "shutdown": "no",
+                    "sap 1/1/2:100": {"shutdown": "no"},
+                }
+            },
+        ),
+        (
+            ["configure", "router Base", "interface system"],
+            {"interface system": {"address": "1.1.1.5/32"}},
+        ),
+    ]
+    assert result == ref
+
+    sections = parser.iter_sections(iter(lines), depth=1)
+    assert [datapath.paths for datapath, __ in sections] == [
+        ["configure", "service"],
+        ["configure", "router Base"],
+    ]
+
+
+def test_parse_parallel():
+    cfg_text = """
+# TiMOS-B-20.10.R1
+exit all
+configure
+    system
+        name "PE1"
+        netconf
+            no auto-config-save
+        exit
+    exit
+    port 1/1/1
+        card 1
+        exit
+        no shutdown
+    exit
+    system
+        location "site 1"
+        netconf
+            listen
+                no shutdown
+            exit
+        exit
+    exit
+    port 1/1/2
+        card 2
+    port 1/1/3
+        exit
+    exit
+exit all
+# Finished
+"""
+    lines = cfg_text.split("\n")
+
+    parser = NokiaClassicParser()
+    parser.parse(lines)
+
+    for chunk_sz in (1, 3, 1000):
+        parallel_parser = NokiaClassicParser()
+        parallel_parser.parse_parallel(iter(lines), workers=2, chunk_sz=chunk_sz)
+
+        assert parallel_parser.dumps() == parser.dumps()
+
+    # Sections grafted as store views become tokens when parsed into again
+    parser.parse(lines)
+    parallel_parser.parse(lines)
+    assert parallel_parser.dumps() == parser.dumps()
+
+
+def test_parser_dump():
+    lines = ["# TiMOS-B-20.10.R1", "configure"]
+    for idx in range(200):
+        lines += [
+            f"    port 1/1/{idx}",
+            f'        description "port {idx}"',
+            "        ethernet",
+            "            mode access",
+            "        exit",
+            "        no shutdown",
+            "    exit",
+        ]
+    lines += ["exit all", "# Finished"]
+
+    parser = NokiaClassicParser()
+    parser.parse(lines)
+
+    fp = io.StringIO()
+    parser.dump(fp)
+    assert fp.getvalue() == parser.dumps()
+
+    text = parser.dumps().split("\n")
+    assert text[:5] == [
+        "[root: 0]",
+        "configure",
+        "    port 1/1/199",
+        "        shutdown no",
+        "        ethernet",
+    ]
+    assert len(text) == 2 + 200 * 5 + 1
+
+    # Deep trees are rendered without recursion
+    token = parser._tree.tokens[0]
+    for idx in range(5000):
+        token = token.childs.setdefault(f"level {idx}", Token("level", str(idx), 0))
+    assert Transformer(parser._tree.tokens[0]).to_structured_text().count("\n") == (
+        200 * 5 + 5000
+    )
@@ -0,0 +1,69 @@
+import io
+import json
+
+from cfgparser.cisco.parser import CiscoParser
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.path.parser import DataPathParser
+from cfgparser.tree.encoder import JsonEncoder
+
+
+def test_encoder_nokia():
+    cfg_text = """
+# TiMOS-B-20.10.R1
+configure
+    system
+        name "PE1"
+        location "site \\"1\\" é"
+    exit
+    service
+        vpls 10 name "vpls-10" customer 1 create
+            sap 1/1/1:10 create
+            exit
+            stp
+            exit
+            no shutdown
+        exit
+    exit
+exit all
+# Finished
+"""
+    parser = NokiaClassicParser()
+    parser.parse(cfg_text.split("\n"))
+
+    fp = io.StringIO()
+    parser.dump_json(fp)
+    assert fp.getvalue() == json.dumps(parser.to_dict(), indent=4, sort_keys=True)
+
+    encoder = JsonEncoder(indent=None, sort_keys=False)
+    text = "".join(encoder.iter_dict(parser._tree.tokens))
+    assert text == json.dumps(parser.to_dict())
+
+
+def test_encoder_cisco_query():
+    cfg_text = """
+!
+interface GigabitEthernet0/0/1
+ description uplink
+ ip address 10.0.0.1 255.255.255.0
+!
+interface GigabitEthernet0/0/2
+ shutdown
+!
+end
+"""
+    parser = CiscoParser()
+    parser.parse(iter(cfg_text.split("\n")))
+    views = parser.query(DataPathParser("interface/Gi").parse())
+    matches = [view.to_dict() for view in views]
+
+    fp = io.StringIO()
+    parser.dump_json(fp, DataPathParser("interface/Gi").parse())
+    assert fp.getvalue() == json.dumps(matches, indent=4, sort_keys=True)
+
+    fp = io.StringIO()
+    parser.dump_json(fp, DataPathParser("interface/Gi").parse(), ndjson=True)
+    assert [json.loads(line) for line in fp.getvalue().splitlines()] == matches
+
+    fp = io.StringIO()
+    parser.dump_json(fp, DataPathParser("vlan").parse())
+    assert fp.getvalue() == "[]"
@@ -0,0 +1,177 @@
+import pytest
+
+from cfgparser.cisco.parser import CiscoParser
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.path.path import DataPath
+from cfgparser.tree.finder import CompiledQuery
+from cfgparser.tree.finder import Query
+from cfgparser.tree.finder import compile_path
+
+CFG_TEXT = """
+hostname {}
+!
+interface GigabitEthernet0/1
+ description uplink
+ shutdown
+!
+interface GigabitEthernet0/2
+ description {}
+!
+interface Loopback0
+ ip address 10.0.0.1 255.255.255.255
+!
+"""
+
+ROOTS_TEXT = """
+!
+interface Gi1
+ description up
+!
+interface Gi2
+ description down
+!
+router bgp 65000
+ neighbor 10.0.0.2 remote-as 65001
+!
+line vty 0 4
+ transport input ssh
+!
+"""
+
+SERVICE_TEXT = """
+# TiMOS-B-20.10.R1
+configure
+    service
+        vpls 10 customer 10 create
+            description "ten"
+            sap 1/1/1:10 create
+                no shutdown
+            exit
+            no shutdown
+        exit
+        vpls 20 customer 30 create
+            sap 1/1/2:20 create
+            exit
+            shutdown
+        exit
+    exit
+exit all
+"""
+
+
+def _parse(hostname: str) -> CiscoParser:
+    parser = CiscoParser()
+    parser.parse(CFG_TEXT.format(hostname, hostname).split("\n"))
+    return parser
+
+
+def test_compiled_query():
+    compiled = compile_path("interface/GIGABIT")
+    assert compiled.paths == ("interface", "GIGABIT")
+    assert compiled.segments == ("interface", "gigabit")
+    assert compile_path("interface/GIGABIT") is compiled
+
+    # The same plan runs on any tree, like the query of a datapath
+    for hostname in ("r1", "r2"):
+        parser = _parse(hostname)
+        datapath = DataPath(["interface", "Gigabit"])
+        expected = Query(parser._tree.tokens).query(datapath)
+        assert len(expected) == 2
+
+        assert compiled.execute(Query(parser._tree.tokens)) == expected
+        assert parser.query(compiled) == parser.query(datapath)
+        assert datapath.paths == ["interface", "Gigabit"]
+
+    assert CompiledQuery(DataPath()).execute(Query(parser._tree.tokens)) == []
+
+
+def test_query_many():
+    parser = _parse("r1")
+    query = Query(parser._tree.tokens)
+    texts = ["interface/Gigabit", "interface/gigabit/shut", "interface/Loop", "vlan"]
+    compileds = [compile_path(text) for text in texts]
+
+    assert query.query_many(compileds) == [c.execute(query) for c in compileds]
+
+    results = parser.query_many(texts)
+    assert list(results) == texts
+    assert results["interface/Loop"] == parser.query(compile_path("interface/Loop"))
+    assert results["vlan"] == []
+
+
+def test_wildcard_query():
+    parser = _parse("r1")
+    query = Query(parser._tree.tokens)
+
+    def ids(text: str) -> list:
+        return [token.id for token in compile_path(text).execute(query)]
+
+    interfaces = ["GigabitEthernet0/1", "GigabitEthernet0/2", "Loopback0"]
+    assert ids("interface/*") == interfaces
+    assert ids("interface/*/description") == ["description uplink", "description r1"]
+    assert ids("**/description") == ["description uplink", "description r1"]
+    assert ids("interface/**/shutdown") == ["shutdown"]
+    assert "netmask 255.255.255.255" in ids("interface/Loopback0/**")
+
+    # Regexes ignore case and are quoted when they have the delimiter, an
+    # anchored literal start is found with the index
+    assert ids('interface/"~ethernet0/[2-9]~"') == ["GigabitEthernet0/2"]
+    assert ids('interface/"~^giga.*/1$~"') == ["GigabitEthernet0/1"]
+    assert compile_path("~^giga.*~").steps[0].prefix == "giga"
+    assert parser.query(compile_path("**/~^desc~")) == [
+        {"description": "uplink"},
+        {"description": "r1"},
+    ]
+
+    with pytest.raises(ValueError):
+        compile_path("interface/~[~")
+
+
+def test_query_under_found_roots():
+    parser = CiscoParser()
+    parser.parse(ROOTS_TEXT.split("\n"))
+    query = Query(parser._tree.tokens)
+
+    def ids(text: str) -> list:
+        return [token.id for token in compile_path(text).execute(query)]
+
+    # Parts after the first search under the matched roots only
+    assert ids("interface/*") == ["Gi1", "Gi2"]
+    assert ids("interface/**/neighbor") == []
+    assert ids("router/**/neighbor") == ["neighbor"]
+    assert ids("line/*") == ["vty"]
+
+    texts = ["interface/gi1", "interface/gi2/desc", "router/bgp/6", "line/vty/0"]
+    compileds = [compile_path(text) for text in texts]
+    assert query.query_many(compileds) == [c.execute(query) for c in compileds]
+    assert [len(founds) for founds in query.query_many(compileds)] == [1, 1, 1, 1]
+
+
+def test_predicate_query():
+    parser = NokiaClassicParser()
+    parser.parse(SERVICE_TEXT.split("\n"))
+
+    def query(text: str) -> list:
+        return parser.query(compile_path(text))
+
+    # Predicates match params pairs or the value of a child, ignoring case
+    assert query("configure/service/vpls[customer=10]/sap") == [
+        {"sap 1/1/1:10": {"shutdown": "no"}}
+    ]
+    assert query("configure/service/vpls[Shutdown=YES][customer=30]/sap") == [
+        {"sap 1/1/2:20": {}}
+    ]
+    assert query("configure/service/vpls[customer=99]") == []
+    assert query("**/sap[shutdown=no]") == [{"sap 1/1/1:10": {"shutdown": "no"}}]
+    assert query('configure/service/*[description="ten"]/description') == [
+        {"description": "ten"}
+    ]
+
+    # A predicate of the first part narrows the roots searched next
+    cisco = CiscoParser()
+    cisco.parse(ROOTS_TEXT.split("\n"))
+    assert cisco.query(compile_path("interface[description=up]/*")) == []
+    assert cisco.query(compile_path("*[description=up]/*")) == []
+    assert cisco.query(compile_path("interface/*[description=up]/*")) == [
+        {"description": "up"}
+    ]
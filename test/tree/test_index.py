@@ -0,0 +1,59 @@
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.path.path import DataPath
+from cfgparser.tree.index import PathIndex
+
+CFG_TEXT = """
+# TiMOS-B-20.10.R1
+configure
+    port 1/1/10
+        no shutdown
+    exit
+    port 1/1/2
+        shutdown
+    exit
+    port 1/1/1
+        no shutdown
+    exit
+    {}
+        shutdown
+    exit
+exit all
+# Finished
+"""
+
+
+def test_index_find():
+    parser = NokiaClassicParser()
+    parser.parse(CFG_TEXT.format("port 1/1/3").split("\n"))
+    configure = parser._tree.tokens[0]
+
+    index = PathIndex(parser._tree.tokens)
+    assert index.find(None, "CONF") == [configure]
+    assert index.find(None, "port") == []
+
+    # Matches keep the order of the tree
+    founds = index.find(configure, "Port 1/1/1")
+    assert founds == [
+        c for c in configure.iter_childs() if c.id in ("port 1/1/1", "port 1/1/10")
+    ]
+    assert index.find(configure, "") == list(configure.iter_childs())
+    assert len(index) == 1
+
+
+def test_index_query():
+    parser = NokiaClassicParser()
+    parser.parse(CFG_TEXT.format("port 1/1/3").split("\n"))
+
+    result = parser.query(DataPath(["configure", "port 1/1/2"]))
+    assert result == [{"port 1/1/2": {"shutdown": "yes"}}]
+    generation = parser.generation
+
+    # A new parse changes the tree and drops the index
+    parser.parse(CFG_TEXT.format("port 1/1/20").split("\n"))
+    assert parser.generation == generation + 1
+
+    result = parser.query(DataPath(["configure", "port 1/1/2"]))
+    assert {"port 1/1/20": {"shutdown": "yes"}} in result
+
+    parser.compact()
+    assert parser.query(DataPath(["configure", "port 1/1/2"])) == result
@@ -0,0 +1,77 @@
+from cfgparser.base import batch
+from cfgparser.cisco.parser import CiscoParser
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.tree.pool import StringPool
+
+NOKIA_CFG = """
+# TiMOS-B-20.10.R1
+configure
+    router
+        interface "uplink"
+            shutdown
+        exit
+    exit
+exit all
+# Finished
+"""
+
+CISCO_CFG = """
+!
+interface GigabitEthernet0/0/1
+ shutdown
+!
+end
+"""
+
+
+def test_pool_intern():
+    pool = StringPool()
+    word = "".join(["shut", "down"])
+
+    assert pool.intern(word) is word
+    assert pool.intern("".join(["shut", "down"])) is word
+    assert pool.stats() == {
+        "size": 1,
+        "bytes": pool.stats()["bytes"],
+        "hits": 1,
+        "misses": 1,
+        "hit_rate": 0.5,
+    }
+
+    pool.clear()
+    assert len(pool) == 0 and pool.stats()["hit_rate"] == 0.0
+
+
+def test_pool_shared_parsers():
+    pool = StringPool()
+
+    nokia_parser = NokiaClassicParser(pool)
+    nokia_parser.parse(NOKIA_CFG.split("\n"))
+    cisco_parser = CiscoParser(pool)
+    cisco_parser.parse(iter(CISCO_CFG.split("\n")))
+
+    nokia_router = nokia_parser._tree.tokens[0].childs["router"]
+    cisco_interface = cisco_parser._tree.tokens[0]
+    assert nokia_router.childs["interface uplink"].name is cisco_interface.name
+    assert cisco_interface.childs["GigabitEthernet0/0/1"].value == "shutdown"
+    assert pool.hits > 0
+
+    # A private pool is released once the config is parsed
+    parser = NokiaClassicParser()
+    parser.parse(NOKIA_CFG.split("\n"))
+    assert parser.pool is None and len(parser._tree.pool) == 0
+
+
+def test_pool_parse_many(tmp_path):
+    f_paths = []
+    for idx in range(4):
+        f_path = tmp_path / f"cfg_{idx}.txt"
+        f_path.write_text(CISCO_CFG)
+        f_paths.append(str(f_path))
+
+    pool = StringPool()
+    parsers = batch.parse_many(f_paths, workers=2, pool=pool)
+
+    names = {id(p._tree.tokens[0].name) for p in parsers}
+    assert len(names) == 1
+    assert pool.stats()["hit_rate"] > 0.5
@@ -0,0 +1,83 @@
+from cfgparser.cisco.parser import CiscoParser
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.path.path import DataPath
+from cfgparser.tree.store import StoreTree
+
+
+def _snapshot(parser) -> tuple:
+    paths = [str(datapath) for datapath in parser.get_paths()]
+    queries = [
+        parser.query(DataPath(["configure", "service", "vpls 10"])),
+        parser.query(DataPath(["interface", "Gi"])),
+    ]
+    return parser.dumps(), parser.to_dict(), paths, queries
+
+
+def test_store_nokia():
+    cfg_text = """
+# TiMOS-B-20.10.R1
+configure
+    service
+        vpls 10 name "vpls-10" customer 1 create
+            description "vpls 10"
+            stp
+                shutdown
+            exit
+            sap 1/1/1:10 create
+                no shutdown
+            exit
+            mesh-sdp 20:10 create
+            exit
+        exit
+    exit
+exit all
+# Finished
+"""
+    parser = NokiaClassicParser()
+    parser.parse(cfg_text.split("\n"))
+    ref = _snapshot(parser)
+
+    parser.compact()
+    assert isinstance(parser._tree, StoreTree)
+    assert _snapshot(parser) == ref
+
+    vpls = parser._tree.tokens[0].childs["service"].childs["vpls 10"]
+    assert vpls.id == "vpls 10"
+    assert {"sap 1/1/1:10", "mesh-sdp 20:10"} <= {c.id for c in vpls.iter_childs()}
+    assert vpls.childs["sap 1/1/1:10"].params == ["create"]
+
+    # Lines parsed after compact() are merged in the tokens moved back
+    parser.parse(cfg_text.replace("1/1/1:10", "1/1/2:10").split("\n"))
+    assert not isinstance(parser._tree, StoreTree)
+    saps = parser.query(DataPath(["configure", "service", "vpls 10", "sap"]))
+    assert [list(sap) for sap in saps] == [["sap 1/1/1:10"], ["sap 1/1/2:10"]]
+
+
+def test_store_cisco():
+    cfg_text = """
+!
+interface GigabitEthernet0/0/1
+ description uplink
+ ip address 10.0.0.1 255.255.255.0
+ no shutdown
+!
+banner motd ^C
+hello
+^C
+end
+"""
+    parser = CiscoParser()
+    parser.parse(iter(cfg_text.split("\n")))
+    ref = _snapshot(parser)
+
+    parser.compact()
+    assert _snapshot(parser) == ref
+
+    # Strings are stored once in the store
+    strings = parser._tree.store.strings
+    assert len(strings) == len(set(strings))
+
+    parser.parse(iter(cfg_text.replace("uplink", "core").split("\n")))
+    assert parser.query(DataPath(["interface", "Gi", "desc"])) == [
+        {"description": "core"}
+    ]
@@ -0,0 +1,124 @@
+import gc
+import pickle
+import tracemalloc
+
+import pytest
+
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+
+from cfgparser.tree.token import AbstractTokenBuilder
+from cfgparser.tree.token import Token
+from cfgparser.tree.token import TokenBuilderRegistry
+
+
+class _DummyBuilder(AbstractTokenBuilder):
+    keywords = (("dummy", None), ("no", 2))
+
+    @staticmethod
+    def check_rule(words: list) -> bool:
+        return "dummy" in words
+
+    @staticmethod
+    def create(words: list, indent: int, indent_step_sz: int = 1) -> Token:
+        return Token("dummy", None, indent)
+
+
+class _DummyTwoWordsBuilder(_DummyBuilder):
+    keywords = (("dummy", 2),)
+
+
+class _NoKeywordBuilder(_DummyBuilder):
+    keywords = ()
+
+
+def test_registry_find():
+    builder = _DummyBuilder()
+    two_words_builder = _DummyTwoWordsBuilder()
+    registry = TokenBuilderRegistry([two_words_builder, builder])
+
+    assert registry.find(["dummy", "1"]) is two_words_builder
+    assert registry.find(["dummy"]) is builder
+    assert registry.find(["dummy", "1", "2"]) is builder
+    assert registry.find(["no", "dummy"]) is builder
+    assert registry.find(["no", "dummy", "1"]) is None
+    assert registry.find(["no", "shutdown"]) is None
+    assert registry.find(["other", "dummy"]) is None
+    assert registry.find([]) is None
+
+
+def test_registry_without_keywords():
+    with pytest.raises(ValueError):
+        TokenBuilderRegistry([_NoKeywordBuilder()])
+
+
+def _iter_tree(tokens: list):
+    for token in tokens:
+        yield token
+        yield from _iter_tree(list(token.iter_childs()))
+
+
+def test_token_footprint():
+    lines = ["# TiMOS-B-20.10.R1", "configure", "    service"]
+    for idx in range(2000):
+        lines += [
+            f'        vpls {idx} name "vpls-{idx}" customer 1 create',
+            f'            description "vpls {idx}"',
+            "            service-mtu 1514",
+            "            stp",
+            "                shutdown",
+            "            exit",
+            f"            sap 1/1/{idx % 40 + 1}:{idx} create",
+            f'                description "sap {idx}"',
+            "                ingress",
+            "                    qos 10",
+            "                exit",
+            "                egress",
+            "                    qos 10",
+            "                exit",
+            "                no shutdown",
+            "            exit",
+            "            no shutdown",
+            "        exit",
+        ]
+    lines += ["    exit", "exit all", "# Finished"]
+
+    # Memory kept by the parsed tree, nodes, childs dicts, params and words
+    gc.collect()
+    tracemalloc.start()
+    parser = NokiaClassicParser()
+    parser.parse(lines)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    n_tokens = len(list(_iter_tree(parser._tree.tokens)))
+    assert n_tokens > 30000
+
+    # The tree took 383 bytes per node with a __dict__ Token on CPython 3.12,
+    # it takes about 205 now
+    old_node_size = 383
+    assert size / n_tokens < old_node_size / 1.5
+
+
+def test_token_leaf():
+    token = Token("port", "1/1/1", 4)
+    assert not token.has_childs and not token.has_params
+    assert token.id == "port 1/1/1"
+
+    # Childs and params are allocated on write only
+    token.childs["shutdown"] = Token("shutdown", None, 8)
+    token.params.append("create")
+    assert token.has_childs and token.has_params
+    assert not Token("port", "1/1/2", 4).has_childs
+
+    token.value = "1/1/3"
+    token.is_container = True
+    assert token.id == "port 1/1/3"
+    assert token.indent == 4
+
+    token.indent = 8
+    assert token.indent == 8 and token.is_container
+
+    copied = pickle.loads(pickle.dumps(token))
+    assert copied.id == "port 1/1/3" and copied.is_container
+    assert copied.params == ["create"] and list(copied.childs) == ["shutdown"]
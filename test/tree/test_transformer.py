@@ -0,0 +1,55 @@
+from collections.abc import Mapping
+
+import pytest
+
+from cfgparser.nokia.classic.parser import NokiaClassicParser
+from cfgparser.path.path import DataPath
+from cfgparser.tree.transformer import TokenView
+from cfgparser.tree.transformer import Transformer
+
+CFG_TEXT = """
+# TiMOS-B-20.10.R1
+configure
+    service
+        vpls 10 customer 10 create
+            description "ten"
+            sap 1/1/1:10 create
+                no shutdown
+            exit
+        exit
+    exit
+    port 1/1/1
+        shutdown
+    exit
+exit all
+# Finished
+"""
+
+
+def test_token_view():
+    parser = NokiaClassicParser()
+    parser.parse(CFG_TEXT.split("\n"))
+    configure = parser._tree.tokens[0]
+
+    view = Transformer(configure).to_view()
+    assert view == Transformer(configure).to_dict()
+    assert view.to_dict() == Transformer(configure).to_dict()
+
+    # Keys of a level are read on first access only
+    service = view["configure"]["service"]
+    assert isinstance(service, TokenView) and service._entries is None
+    assert list(service) == ["vpls 10"]
+    assert service["vpls 10"]["description"] == "ten"
+    assert "sap 1/1/1:10" in service["vpls 10"]
+    assert service.get("vpls 20") is None
+
+    with pytest.raises(TypeError):
+        view["configure"] = {}
+
+    # Query matches are views, the same after compact()
+    matches = parser.query(DataPath(["configure", "port"]))
+    assert isinstance(matches[0], Mapping)
+    assert matches == [{"port 1/1/1": {"shutdown": "yes"}}]
+
+    parser.compact()
+    assert parser.query(DataPath(["configure", "port"])) == matches